@@ -0,0 +1,247 @@
+import os
+import json
+import time
+import argparse
+import tempfile
+from datetime import datetime
+from email.message import EmailMessage
+import pandas as pd
+from data_store import AQI_COLUMNS, LOCATION_COLUMNS, load_locations
+from fetch import file_lock
+from forecast_table import lookup_forecast
+from model_store import load_model
+from sharded_model import ShardedModel, shards_exist
+from tabs.prediction_tab import CATEGORY_NAMES, categorize_aqi
+from tabs.advice_tab import get_detailed_advice
+from tabs.alerts_tab import send_email
+
+SUBSCRIBERS_PATH = "data/subscribers.csv"
+STATE_PATH = "data/alert_state.json"
+
+DEFAULT_HYSTERESIS_AQI = 10
+DEFAULT_QUIET_HOURS = (22, 7)
+
+
+class SmtpMailer:
+    """Delivers through the same SMTP path as the Alerts tab."""
+
+    def __init__(self, server, port, sender_email, sender_pass):
+        self.args = (server, port, sender_email, sender_pass)
+
+    def send(self, to_email, subject, body):
+        status = send_email(*self.args, to_email, subject, body)
+        return status.startswith("SENT")
+
+
+class OutboxMailer:
+    """Local stand-in for SMTP: writes each message as an .eml file."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def send(self, to_email, subject, body):
+        msg = EmailMessage()
+        msg["To"] = to_email
+        msg["Subject"] = subject
+        msg.set_content(body)
+        name = f"{time.time_ns()}_{to_email.replace('@', '_at_')}.eml"
+        with open(os.path.join(self.directory, name), "wb") as f:
+            f.write(bytes(msg))
+        return True
+
+
+def apply_hysteresis(previous, aqi, margin=DEFAULT_HYSTERESIS_AQI):
+    """
+    Category for aqi, but only leave `previous` once aqi is `margin` past the boundary.
+
+    Stops a location hovering around e.g. AQI 100 from flapping between
+    Moderate and Unhealthy_Sensitive on every run.
+    """
+    raw = categorize_aqi(aqi)
+    if previous is None or raw == previous:
+        return raw
+    rank = CATEGORY_NAMES.index
+    if rank(raw) > rank(previous):
+        return raw if rank(categorize_aqi(aqi - margin)) > rank(previous) else previous
+    return raw if rank(categorize_aqi(aqi + margin)) < rank(previous) else previous
+
+
+def in_quiet_hours(now, quiet_hours):
+    if quiet_hours is None:
+        return False
+    start, end = quiet_hours
+    if start <= end:
+        return start <= now.hour < end
+    return now.hour >= start or now.hour < end
+
+
+def load_subscribers(path=SUBSCRIBERS_PATH):
+    """Subscriber CSV (email, state, county, city) grouped by location."""
+    df = pd.read_csv(path, dtype=str).dropna()
+    df.columns = [c.strip().lower() for c in df.columns]
+    by_location = {}
+    for row in df.itertuples(index=False):
+        loc = (row.state.strip(), row.county.strip(), row.city.strip())
+        by_location.setdefault(loc, []).append(row.email.strip())
+    return by_location
+
+
+def score_locations(locations, date):
+    """Overall AQI per location: forecast table first, one model batch for the misses."""
+    scores, misses = {}, []
+    for loc in locations:
+        forecast = lookup_forecast(*loc, date)
+        if forecast is not None:
+            scores[loc] = max(forecast[c] for c in AQI_COLUMNS)
+        else:
+            misses.append(loc)
+
+    if misses:
+        model = ShardedModel() if shards_exist() else load_model()
+        X = pd.DataFrame(misses, columns=LOCATION_COLUMNS)
+        X["Year"], X["Month"], X["Day"] = date.year, date.month, date.day
+        preds = pd.DataFrame(model.predict(X[["Year", "Month", "Day"] + LOCATION_COLUMNS]),
+                             columns=model.targets)
+        for loc, aqi in zip(misses, preds[AQI_COLUMNS].max(axis=1)):
+            scores[loc] = float(aqi)
+    return scores
+
+
+def _load_state(path):
+    if not os.path.exists(path):
+        return {"locations": {}, "notified": {}, "pending": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_state(state, path):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def _key(*parts):
+    return "|".join(parts)
+
+
+def _message(loc, category, aqi):
+    state, county, city = loc
+    subject = f"Air Quality Alert: {category.replace('_', ' ')} in {city}, {state}"
+    body = (
+        f"The forecast air quality for {city}, {county} County, {state} is now "
+        f"{category.replace('_', ' ')} (AQI {aqi:.0f}).\n\n"
+        f"{get_detailed_advice(category)['precautions']}\n"
+    )
+    return subject, body
+
+
+def evaluate_alerts(mailer, subscribers_path=SUBSCRIBERS_PATH, state_path=STATE_PATH,
+                    hysteresis=DEFAULT_HYSTERESIS_AQI, quiet_hours=DEFAULT_QUIET_HOURS, now=None):
+    """
+    One evaluator run: score, diff against stored categories, notify changes.
+
+    Notification work only touches locations whose (hysteresis-filtered)
+    category changed since the last run, plus anything held back by quiet
+    hours. New subscribers get their current category as a silent baseline;
+    the subscriber list is only scanned for them when the file has changed.
+    """
+    now = now or datetime.now()
+    stats = {"locations": 0, "changed": 0, "queued": 0, "sent": 0, "failed": 0}
+
+    os.makedirs(os.path.dirname(state_path) or ".", exist_ok=True)
+    with file_lock(state_path + ".lock"):
+        state = _load_state(state_path)
+        subscribers = load_subscribers(subscribers_path)
+        known = set(load_locations(start_year=2020).astype(str).itertuples(index=False, name=None))
+        stats["unknown"] = sum(loc not in known for loc in subscribers)
+        scores = score_locations([loc for loc in subscribers if loc in known], now.date())
+        stats["locations"] = len(scores)
+
+        # Subscribers only need a baseline when the list changed since the last run
+        stat = os.stat(subscribers_path)
+        list_stamp = [stat.st_size, stat.st_mtime_ns]
+        list_changed = state.get("subscribers_stamp") != list_stamp
+
+        changed = []
+        for loc, aqi in scores.items():
+            key = _key(*loc)
+            previous = state["locations"].get(key, {}).get("category")
+            category = apply_hysteresis(previous, aqi, hysteresis)
+            state["locations"][key] = {"category": category, "aqi": aqi}
+            if previous is not None and category != previous:
+                changed.append(loc)
+            if list_changed or previous is None:
+                for email in subscribers[loc]:
+                    sub_key = _key(email, key)
+                    if sub_key not in state["notified"]:
+                        state["notified"][sub_key] = category   # silent baseline for a new subscriber
+        state["subscribers_stamp"] = list_stamp
+        stats["changed"] = len(changed)
+
+        # Only subscribers of changed locations need a look
+        for loc in changed:
+            key = _key(*loc)
+            category = state["locations"][key]["category"]
+            for email in subscribers[loc]:
+                sub_key = _key(email, key)
+                if state["notified"].get(sub_key) == category:
+                    state["pending"].pop(sub_key, None)  # back to what they were told
+                else:
+                    state["pending"][sub_key] = {"email": email, "location": list(loc)}
+
+        stats["queued"] = len(state["pending"])
+        if not in_quiet_hours(now, quiet_hours):
+            for sub_key, item in list(state["pending"].items()):
+                loc = tuple(item["location"])
+                current = state["locations"].get(_key(*loc))
+                if current is None:  # location no longer subscribed
+                    state["pending"].pop(sub_key)
+                    continue
+                subject, body = _message(loc, current["category"], current["aqi"])
+                if mailer.send(item["email"], subject, body):
+                    state["notified"][sub_key] = current["category"]
+                    state["pending"].pop(sub_key)
+                    stats["sent"] += 1
+                else:
+                    stats["failed"] += 1
+            stats["queued"] = len(state["pending"])
+
+        _save_state(state, state_path)
+    return stats
+
+
+def _parse_hours(value):
+    if value.lower() == "none":
+        return None
+    start, end = value.split("-")
+    return int(start), int(end)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Scheduled threshold alerts: notify subscribers when their location's category changes."
+    )
+    parser.add_argument("--subscribers", default=SUBSCRIBERS_PATH, help="CSV with email,state,county,city")
+    parser.add_argument("--state", default=STATE_PATH, help="JSON file holding last categories")
+    parser.add_argument("--hysteresis", type=float, default=DEFAULT_HYSTERESIS_AQI,
+                        help="AQI points past a boundary before the category changes")
+    parser.add_argument("--quiet-hours", default="22-7", help="local hours to hold messages, e.g. 22-7, or none")
+    parser.add_argument("--outbox", default=None, help="write .eml files here instead of sending via SMTP")
+    args = parser.parse_args()
+
+    if args.outbox:
+        mailer = OutboxMailer(args.outbox)
+    else:
+        mailer = SmtpMailer(
+            os.getenv("SMTP_SERVER", "smtp.gmail.com"), int(os.getenv("SMTP_PORT", 587)),
+            os.getenv("SENDER_EMAIL", ""), os.getenv("SENDER_PASS", ""),
+        )
+
+    t0 = time.perf_counter()
+    stats = evaluate_alerts(mailer, args.subscribers, args.state, args.hysteresis, _parse_hours(args.quiet_hours))
+    print(f"✅ {stats['locations']} locations scored | {stats['changed']} changed | "
+          f"{stats['sent']} sent | {stats['failed']} failed | {stats['queued']} pending | "
+          f"{stats['unknown']} unknown locations skipped "
+          f"({time.perf_counter() - t0:.2f} s)")
@@ -1,9 +1,10 @@
 import streamlit as st
-from tabs.input_tab import show_input_tab
+from tabs.input_tab import show_input_tab, INPUT_WIDGET_KEYS
 from tabs.prediction_tab import show_prediction_tab
 from tabs.analytics_tab import show_analytics_tab
 from tabs.advice_tab import show_advice_tab
 from tabs.alerts_tab import show_alerts_tab
+from tabs.job_status import show_job_metrics
 
 
 st.set_page_config(
@@ -40,7 +41,8 @@ st.markdown("""
         text-align: center;
     }
     
-    /* Basic tabs with clear gaps */
+    /* Basic tabs with clear gaps (view navigation radio) */
+    .stRadio [role="radiogroup"],
     .stTabs [data-baseweb="tab-list"] {
         display: flex;
         justify-content: space-evenly; /* equal spacing across full width */
@@ -49,6 +51,7 @@ st.markdown("""
         margin-bottom: 1.5rem;
     }
     
+    .stRadio [role="radiogroup"] > label,
     .stTabs [data-baseweb="tab"] {
         height: 3rem;
         padding: 0 5rem;
@@ -60,12 +63,22 @@ st.markdown("""
         margin: 0 2px;
     }
     
+    .stRadio [role="radiogroup"] > label:has(input:checked),
     .stTabs [aria-selected="true"] {
         background: #3498db;
         color: white;
         border-color: #2980b9;
     }
     
+    .stRadio [role="radiogroup"] > label {
+        padding: 0 2rem;
+        align-items: center;
+    }
+    
+    .stRadio [role="radiogroup"] > label > div:first-child {
+        display: none; /* hide the radio dot so options read as tabs */
+    }
+    
     /* Content containers */
     .content-container {
         background: white;
@@ -130,38 +143,27 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
-    "📥 Input Features",
-    "🔮 Prediction", 
-    "📊 Analytics",
-    "💡 Advice",
-    "📲 Alerts"
-])
-
-with tab1:
-    st.markdown('<div class="content-container">', unsafe_allow_html=True)
-    show_input_tab()
-    st.markdown('</div>', unsafe_allow_html=True)
-
-with tab2:
-    st.markdown('<div class="content-container">', unsafe_allow_html=True)
-    show_prediction_tab()
-    st.markdown('</div>', unsafe_allow_html=True)
-
-with tab3:
-    st.markdown('<div class="content-container">', unsafe_allow_html=True)
-    show_analytics_tab()
-    st.markdown('</div>', unsafe_allow_html=True)
-
-with tab4:
-    st.markdown('<div class="content-container">', unsafe_allow_html=True)
-    show_advice_tab()
-    st.markdown('</div>', unsafe_allow_html=True)
-
-with tab5:
-    st.markdown('<div class="content-container">', unsafe_allow_html=True)
-    show_alerts_tab()
-    st.markdown('</div>', unsafe_allow_html=True)
+# Only the selected view runs on a rerun (st.tabs would execute all five bodies)
+VIEWS = {
+    "📥 Input Features": show_input_tab,
+    "🔮 Prediction": show_prediction_tab,
+    "📊 Analytics": show_analytics_tab,
+    "💡 Advice": show_advice_tab,
+    "📲 Alerts": show_alerts_tab,
+}
+
+# Keep Input Features selections while another view is shown (unrendered widgets lose state)
+for key in INPUT_WIDGET_KEYS:
+    if key in st.session_state:
+        st.session_state[key] = st.session_state[key]
+
+st.radio("Navigation", list(VIEWS), key="current_tab", horizontal=True, label_visibility="collapsed")
+
+st.markdown('<div class="content-container">', unsafe_allow_html=True)
+VIEWS[st.session_state.current_tab]()
+st.markdown('</div>', unsafe_allow_html=True)
+
+show_job_metrics()   # operators only: queue depth and wait/run times of the shared job executor
 
 
 st.markdown("""
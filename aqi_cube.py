@@ -0,0 +1,112 @@
+import os
+import time
+import threading
+import numpy as np
+import pandas as pd
+from data_store import DATASET_PATH, AQI_COLUMNS, dataset_version, load_compact_dataset
+
+CUBE_DIR = "models"
+CUBE_METRICS = ["Overall_AQI"] + AQI_COLUMNS
+CUBE_KEYS = ["State", "County", "Year", "Month"]
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def build_cube(df=None, filepath=DATASET_PATH):
+    """Count, mean, max, median and 90th percentile per State × County × Year × Month."""
+    df = load_compact_dataset(filepath) if df is None else df
+    grouped = df.groupby(CUBE_KEYS, observed=True)[CUBE_METRICS]
+
+    parts = {
+        "count": grouped.count(),
+        "mean": grouped.mean(),
+        "max": grouped.max(),
+        "p50": grouped.quantile(0.5),
+        "p90": grouped.quantile(0.9),
+    }
+    cube = pd.concat(parts, axis=1)
+    # Flat "<metric>|<stat>" columns, float32 like the source frame
+    cube.columns = [f"{metric}|{stat}" for stat, metric in cube.columns]
+    cube = cube.astype("float32").reset_index()
+    cube["Year"] = cube["Year"].astype("int16")
+    cube["Month"] = cube["Month"].astype("int8")
+    return cube
+
+
+def load_cube(filepath=DATASET_PATH, cube_dir=CUBE_DIR):
+    """Cube for the current dataset version; built and saved once per version."""
+    version = dataset_version(filepath)
+    with _cache_lock:
+        if version not in _cache:
+            path = os.path.join(cube_dir, f"aqi_cube_{version}.pkl")
+            if os.path.exists(path):
+                cube = pd.read_pickle(path)
+            else:
+                cube = build_cube(filepath=filepath)
+                os.makedirs(cube_dir, exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                cube.to_pickle(tmp_path)
+                os.replace(tmp_path, path)
+            _cache.clear()
+            _cache[version] = cube
+        return _cache[version]
+
+
+def _weighted(cube, by, metric, stat="mean"):
+    """Roll cube cells up to `by`: count-weighted mean of `stat`, overall max, total count."""
+    count = cube[f"{metric}|count"]
+    rolled = pd.DataFrame({
+        "weight": count,
+        "weighted": cube[f"{metric}|{stat}"] * count,
+        "max": cube[f"{metric}|max"],
+    }).groupby([cube[k] for k in by], observed=True).agg(
+        weight=("weight", "sum"), weighted=("weighted", "sum"), max=("max", "max")
+    )
+    rolled[stat] = rolled["weighted"] / rolled["weight"].replace(0, np.nan)
+    return rolled.rename(columns={"weight": "count"})[["count", stat, "max"]].reset_index()
+
+
+def state_month_heatmap(cube, metric="Overall_AQI", year=None):
+    """State × Month matrix of mean AQI (optionally one year)."""
+    cells = cube if year is None else cube[cube["Year"] == year]
+    rolled = _weighted(cells, ["State", "Month"], metric)
+    return rolled.pivot(index="State", columns="Month", values="mean").sort_index()
+
+
+def county_ranking(cube, state, metric="Overall_AQI", year=None, stat="mean", top=15):
+    """Counties of one State ranked by mean (or p90) AQI, worst first."""
+    cells = cube[cube["State"] == state]
+    if year is not None:
+        cells = cells[cells["Year"] == year]
+    rolled = _weighted(cells, ["County"], metric, stat)
+    return rolled.sort_values(stat, ascending=False).head(top).reset_index(drop=True)
+
+
+def seasonal_profile(cube, state, county=None, metric="Overall_AQI"):
+    """Monthly mean, typical 90th percentile and max over all years for a State or County."""
+    cells = cube[cube["State"] == state]
+    if county is not None:
+        cells = cells[cells["County"] == county]
+    mean = _weighted(cells, ["Month"], metric, "mean")
+    p90 = _weighted(cells, ["Month"], metric, "p90")
+    return mean.merge(p90[["Month", "p90"]], on="Month").sort_values("Month")
+
+
+if __name__ == "__main__":
+    t0 = time.perf_counter()
+    cube = load_cube()
+    built = time.perf_counter() - t0
+    print(f"✅ Cube for dataset {dataset_version()}: {len(cube):,} cells "
+          f"({cube.memory_usage(deep=True).sum() / 1024 ** 2:.2f} MB) in {built:.2f} s")
+
+    state = cube["State"].iloc[0]
+    for name, query in [
+        ("state heatmap", lambda: state_month_heatmap(cube)),
+        ("county ranking", lambda: county_ranking(cube, state)),
+        ("seasonal profile", lambda: seasonal_profile(cube, state)),
+    ]:
+        t0 = time.perf_counter()
+        for _ in range(20):
+            query()
+        print(f"⏱️ {name}: {1000 * (time.perf_counter() - t0) / 20:.2f} ms")
@@ -0,0 +1,146 @@
+import time
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error, r2_score
+from data_store import POLLUTANT_TARGETS, load_compact_dataset
+from model_store import save_model, store_size_mb
+from train_model import FEATURE_COLUMNS, build_pipeline
+
+# Candidate configurations (build_pipeline keyword arguments)
+CONFIGS = {
+    "rf100_full": {"n_estimators": 100},
+    "rf50_full": {"n_estimators": 50},
+    "rf100_depth20": {"n_estimators": 100, "max_depth": 20},
+    "rf100_leaf5": {"n_estimators": 100, "min_samples_leaf": 5},
+    "rf50_depth20_leaf5": {"n_estimators": 50, "max_depth": 20, "min_samples_leaf": 5},
+    "rf25_depth15_leaf10": {"n_estimators": 25, "max_depth": 15, "min_samples_leaf": 10},
+}
+
+_data = None
+
+
+def rolling_origin_folds(dates, n_folds=3, test_days=90):
+    """
+    (train_end, test_end) cutoffs for the last n_folds windows of test_days.
+
+    Fold i trains on every row before train_end and tests on
+    [train_end, test_end), so no fold ever sees its own future.
+    """
+    last = pd.Timestamp(dates.max()).normalize() + pd.Timedelta(days=1)
+    cutoffs = [last - pd.Timedelta(days=test_days * k) for k in range(n_folds, -1, -1)]
+    return list(zip(cutoffs[:-1], cutoffs[1:]))
+
+
+def _init_worker(start_year):
+    global _data
+    df = load_compact_dataset()
+    _data = df[df["Year"] >= start_year]
+
+
+def _run_fold(config_name, params, fold, train_end, test_end, latency_rows=50):
+    """Worker: fit one config on one fold and measure accuracy and cost."""
+    df = _data
+    train = df[df["Date"] < train_end]
+    test = df[(df["Date"] >= train_end) & (df["Date"] < test_end)]
+
+    pipeline = build_pipeline(**params, n_jobs=1)
+    t0 = time.perf_counter()
+    pipeline.fit(train[FEATURE_COLUMNS], train[POLLUTANT_TARGETS])
+    fit_s = time.perf_counter() - t0
+
+    y_pred = pipeline.predict(test[FEATURE_COLUMNS])
+    y_true = test[POLLUTANT_TARGETS].to_numpy()
+
+    sample = test[FEATURE_COLUMNS].sample(n=min(latency_rows, len(test)), random_state=0)
+    t0 = time.perf_counter()
+    for i in range(len(sample)):
+        pipeline.predict(sample.iloc[[i]])
+    latency_ms = 1000 * (time.perf_counter() - t0) / len(sample)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        size_mb = store_size_mb(save_model(pipeline, f"{tmp}/model"))
+
+    return {
+        "config": config_name,
+        "fold": fold,
+        "train_rows": len(train),
+        "test_rows": len(test),
+        "fit_s": fit_s,
+        "latency_ms": latency_ms,
+        "size_mb": size_mb,
+        "mae": dict(zip(POLLUTANT_TARGETS, mean_absolute_error(y_true, y_pred, multioutput="raw_values"))),
+        "r2": dict(zip(POLLUTANT_TARGETS, r2_score(y_true, y_pred, multioutput="raw_values"))),
+    }
+
+
+def run_backtest(configs=CONFIGS, n_folds=3, test_days=90, start_year=2020, max_workers=None):
+    """
+    Evaluate every (config, fold) pair in a process pool.
+
+    Returns (summary, per_target): one row per config with fold-averaged
+    cost and accuracy, and one row per config x pollutant with MAE / R².
+    """
+    df = load_compact_dataset()
+    dates = df.loc[df["Year"] >= start_year, "Date"]
+    folds = []
+    for i, (train_end, test_end) in enumerate(rolling_origin_folds(dates, n_folds, test_days)):
+        n_train = int((dates < train_end).sum())
+        n_test = int(((dates >= train_end) & (dates < test_end)).sum())
+        if n_train == 0 or n_test == 0:
+            print(f"⚠️ Skipping fold {i} ({train_end:%Y-%m-%d} – {test_end:%Y-%m-%d}): "
+                  f"{n_train} train rows, {n_test} test rows")
+            continue
+        folds.append((i, train_end, test_end))
+    if not folds:
+        raise ValueError(f"No fold has both training and test data from {start_year} "
+                         f"with {n_folds} folds of {test_days} days; use fewer folds or shorter windows")
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(start_year,)) as pool:
+        futures = [
+            pool.submit(_run_fold, name, params, i, train_end, test_end)
+            for name, params in configs.items()
+            for i, train_end, test_end in folds
+        ]
+        results = [f.result() for f in futures]
+
+    per_target = pd.DataFrame([
+        {"config": r["config"], "fold": r["fold"], "target": t, "mae": r["mae"][t], "r2": r["r2"][t]}
+        for r in results for t in POLLUTANT_TARGETS
+    ]).groupby(["config", "target"], sort=False)[["mae", "r2"]].mean().reset_index()
+
+    summary = pd.DataFrame([
+        {k: r[k] for k in ("config", "fold", "fit_s", "latency_ms", "size_mb")}
+        | {"mae": np.mean(list(r["mae"].values())), "r2": np.mean(list(r["r2"].values()))}
+        for r in results
+    ]).groupby("config", sort=False).mean().drop(columns="fold").reset_index()
+
+    return summary, per_target
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of model configurations.")
+    parser.add_argument("--folds", type=int, default=3)
+    parser.add_argument("--test-days", type=int, default=90)
+    parser.add_argument("--start-year", type=int, default=2020)
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: all cores)")
+    parser.add_argument("--configs", default=",".join(CONFIGS), help="comma-separated subset of CONFIGS")
+    parser.add_argument("--output", default=None, help="write the per-pollutant table to this CSV")
+    args = parser.parse_args()
+
+    selected = {name: CONFIGS[name] for name in args.configs.split(",")}
+    t0 = time.perf_counter()
+    summary, per_target = run_backtest(selected, args.folds, args.test_days, args.start_year, args.workers)
+
+    pd.set_option("display.width", 200)
+    print(f"\n📊 Backtest ({args.folds} folds × {args.test_days} days, {time.perf_counter() - t0:.1f} s)")
+    print(summary.to_string(index=False, float_format="{:.3f}".format))
+    print("\n📋 Per-pollutant MAE (mean over folds; --output adds R²):")
+    print(per_target.pivot(index="target", columns="config", values="mae")
+          .loc[POLLUTANT_TARGETS].to_string(float_format="{:.3f}".format))
+    if args.output:
+        per_target.to_csv(args.output, index=False)
+        print(f"💾 Per-pollutant table written to {args.output}")
@@ -0,0 +1,156 @@
+import os
+import time
+import threading
+import tempfile
+import numpy as np
+import pandas as pd
+from data_store import DATASET_PATH, LOCATION_COLUMNS, POLLUTANT_TARGETS, dataset_version, load_compact_dataset
+
+CLIMATOLOGY_DIR = "models"
+
+METRICS = ["Overall_AQI"] + POLLUTANT_TARGETS
+PERCENTILES = [5, 10, 25, 50, 75, 90, 95]
+STATS = ["mean"] + [f"p{p}" for p in PERCENTILES]
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+class Climatology:
+    """Per-location, per-month mean and percentile bands, served by array lookup."""
+
+    def __init__(self, states, counties, cities, values):
+        locations = zip(states.tolist(), counties.tolist(), cities.tolist())
+        self.index = {loc: i for i, loc in enumerate(locations)}
+        # values[location, month - 1, metric, stat]; NaN where a month has no data
+        self.values = values
+
+    def _row(self, state, county, city, month):
+        i = self.index.get((state, county, city))
+        if i is None:
+            return None
+        row = self.values[i, month - 1]
+        return None if np.isnan(row[0, 0]) else row
+
+    def lookup(self, state, county, city, month):
+        """{metric: {stat: value}} for one location and month, or None."""
+        row = self._row(state, county, city, month)
+        if row is None:
+            return None
+        return {
+            metric: dict(zip(STATS, row[m].tolist()))
+            for m, metric in enumerate(METRICS)
+        }
+
+    def monthly_profile(self, state, county, city, metric="Overall_AQI"):
+        """DataFrame of the 12 monthly stats for one metric (empty months are NaN)."""
+        i = self.index.get((state, county, city))
+        if i is None:
+            return None
+        profile = pd.DataFrame(self.values[i, :, METRICS.index(metric)], columns=STATS)
+        profile.insert(0, "Month", np.arange(1, 13))
+        return profile
+
+    def percentile_rank(self, state, county, city, month, value, metric="Overall_AQI"):
+        """
+        Approximate percentile of value within the location's history for that month.
+
+        Linear between adjacent percentile bands. A value equal to tied bands
+        (common for low-AQI pollutants) gets the middle of their ranks. The
+        bands only reach p5 and p95, so results are clamped to 5..95.
+        """
+        row = self._row(state, county, city, month)
+        if row is None:
+            return None
+        bands = row[METRICS.index(metric), 1:]
+        ranks = np.asarray(PERCENTILES, dtype=float)
+        lo = np.searchsorted(bands, value, side="left")
+        hi = np.searchsorted(bands, value, side="right")
+        if lo < hi:
+            return float(ranks[lo:hi].mean())
+        if lo == 0:
+            return float(ranks[0])
+        if lo == len(bands):
+            return float(ranks[-1])
+        # bands[lo - 1] < value < bands[lo], so the segment has non-zero width
+        share = (value - bands[lo - 1]) / (bands[lo] - bands[lo - 1])
+        return float(ranks[lo - 1] + share * (ranks[lo] - ranks[lo - 1]))
+
+    def estimate(self, state, county, city, month):
+        """Historical monthly mean of every pollutant target (fallback prediction)."""
+        row = self._row(state, county, city, month)
+        if row is None:
+            return None
+        return {
+            target: float(row[METRICS.index(target), 0])
+            for target in POLLUTANT_TARGETS
+        }
+
+
+def build_climatology(df=None, filepath=DATASET_PATH):
+    """One grouped pass over the shared dataset -> (locations, values array)."""
+    df = load_compact_dataset(filepath) if df is None else df
+
+    loc_id = df.groupby(LOCATION_COLUMNS, observed=True, sort=True).ngroup()
+    locs = (
+        df[LOCATION_COLUMNS].assign(loc_id=loc_id.values)
+        .drop_duplicates("loc_id").sort_values("loc_id")
+    )
+
+    grouped = df[METRICS].groupby([loc_id.values, df["Month"].values])
+    means = grouped.mean()
+    quantiles = grouped.quantile([p / 100 for p in PERCENTILES]).unstack()
+
+    values = np.full((len(locs), 12, len(METRICS), len(STATS)), np.nan, dtype=np.float32)
+    loc_idx = means.index.get_level_values(0).to_numpy()
+    month_idx = means.index.get_level_values(1).to_numpy() - 1
+    for m, metric in enumerate(METRICS):
+        values[loc_idx, month_idx, m, 0] = means[metric].to_numpy()
+        values[loc_idx, month_idx, m, 1:] = quantiles[metric].loc[means.index].to_numpy()
+    return locs, values
+
+
+def climatology_path(filepath=DATASET_PATH, climatology_dir=CLIMATOLOGY_DIR):
+    """One file per dataset version, so refreshed data never serves stale bands."""
+    return os.path.join(climatology_dir, f"climatology_{dataset_version(filepath)}.npz")
+
+
+def save_climatology(locs, values, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".npz")
+    with os.fdopen(fd, "wb") as f:
+        np.savez(
+            f,
+            states=np.asarray(locs["State"], dtype=str),
+            counties=np.asarray(locs["County"], dtype=str),
+            cities=np.asarray(locs["City"], dtype=str),
+            values=values,
+        )
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_climatology(filepath=DATASET_PATH, climatology_dir=CLIMATOLOGY_DIR):
+    """Climatology for the current dataset version; built and saved once per version."""
+    path = climatology_path(filepath, climatology_dir)
+    with _cache_lock:
+        if path not in _cache:
+            if not os.path.exists(path):
+                save_climatology(*build_climatology(filepath=filepath), path=path)
+            with np.load(path) as data:
+                climatology = Climatology(
+                    data["states"], data["counties"], data["cities"], data["values"]
+                )
+            _cache.clear()
+            _cache[path] = climatology
+        return _cache[path]
+
+
+if __name__ == "__main__":
+    t0 = time.perf_counter()
+    locs, values = build_climatology()
+    path = save_climatology(locs, values, climatology_path())
+    elapsed = time.perf_counter() - t0
+    size_mb = os.path.getsize(path) / 1024 ** 2
+    print(f"✅ Climatology for {len(locs):,} locations × 12 months × {len(METRICS)} metrics")
+    print(f"⏱️ Build time: {elapsed:.2f} s | 💾 Size: {size_mb:.2f} MB -> {path}")
@@ -0,0 +1,190 @@
+import os
+import threading
+import pandas as pd
+from fetch import fetch_file
+
+DATASET_PATH = "data/US_air_pollution_dataset_2000_2023.csv"
+
+# Oldest year any consumer reads (the analytics history starts in 2015)
+EARLIEST_YEAR = 2015
+
+LOCATION_COLUMNS = ["State", "County", "City"]
+AQI_COLUMNS = ["O3 AQI", "CO AQI", "SO2 AQI", "NO2 AQI"]
+POLLUTANT_TARGETS = [
+    "O3 Mean", "O3 1st Max Value", "O3 AQI",
+    "CO Mean", "CO 1st Max Value", "CO AQI",
+    "SO2 Mean", "SO2 1st Max Value", "SO2 AQI",
+    "NO2 Mean", "NO2 1st Max Value", "NO2 AQI"
+]
+
+_cache = {}
+_cache_lock = threading.RLock()
+
+# filepath -> ((dataset stamp, sidecar stamp), version) for dataset_version()
+_versions = {}
+
+
+def ensure_dataset(filepath=DATASET_PATH):
+    """Download the dataset (once per host, verified) if it is not present locally."""
+    return fetch_file(filepath)
+
+
+def _file_stamp(path):
+    """(size, mtime_ns) of path, or None if it doesn't exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def dataset_version(filepath=DATASET_PATH):
+    """
+    Checksum recorded by the fetch layer, else file size + mtime.
+
+    Cached per process and only recomputed when the dataset or its checksum
+    sidecar changes on disk, so callers can key caches on it cheaply.
+    """
+    sidecar = filepath + ".sha256"
+    stamps = (_file_stamp(filepath), _file_stamp(sidecar))
+    with _cache_lock:
+        cached = _versions.get(filepath)
+        if cached is not None and cached[0] == stamps and stamps[0] is not None:
+            return cached[1]
+
+    ensure_dataset(filepath)
+    stamps = (_file_stamp(filepath), _file_stamp(sidecar))
+    if stamps[1] is not None:
+        with open(sidecar) as f:
+            version = f.read().strip()[:16]
+    else:
+        version = f"{stamps[0][0]:x}-{stamps[0][1] // 10**9:x}"
+    with _cache_lock:
+        _versions[filepath] = (stamps, version)
+    return version
+
+
+def read_clean_csv(filepath):
+    """Every year of the source CSV, model columns only, de-duplicated and median-filled."""
+    dtypes = {c: "category" for c in LOCATION_COLUMNS}
+    dtypes.update({c: "float32" for c in POLLUTANT_TARGETS})
+    df = pd.read_csv(
+        filepath,
+        usecols=["Date"] + LOCATION_COLUMNS + POLLUTANT_TARGETS,
+        dtype=dtypes,
+        parse_dates=["Date"],
+    )
+
+    # Same cleaning the original training script used: duplicates dropped, gaps median-filled
+    df = df.drop_duplicates()
+    return df.fillna(df.median(numeric_only=True).astype("float32"))
+
+
+def _read_compact(filepath):
+    from partitions import partitions_current, read_partitions
+
+    if partitions_current(filepath):
+        # Only the EARLIEST_YEAR+ partitions are opened; rows come back cleaned, in CSV order
+        df = read_partitions(start_year=EARLIEST_YEAR).drop(columns="Year")
+    else:
+        df = read_clean_csv(filepath)
+        df = df[df["Date"].dt.year >= EARLIEST_YEAR].reset_index(drop=True)
+
+    for col in LOCATION_COLUMNS:
+        df[col] = df[col].cat.remove_unused_categories()
+
+    df["Year"] = df["Date"].dt.year.astype("int16")
+    df["Month"] = df["Date"].dt.month.astype("int8")
+    df["Day"] = df["Date"].dt.day.astype("int8")
+    df["Overall_AQI"] = df[AQI_COLUMNS].max(axis=1).astype("float32")
+    return df
+
+
+def _cached(kind, filepath, build, *args):
+    """Process-wide entry for the current version of filepath; a replaced dataset drops the old ones."""
+    version = dataset_version(filepath)
+    key = (kind, filepath, version) + args
+    with _cache_lock:
+        if key not in _cache:
+            for stale in [k for k in _cache if k[1] == filepath and k[2] != version]:
+                del _cache[stale]
+            _cache[key] = build()
+        return _cache[key]
+
+
+def _have_compact(filepath):
+    """Whether this process already holds the compact frame for the current version of filepath."""
+    version = dataset_version(filepath)
+    with _cache_lock:
+        return ("dataset", filepath, version) in _cache
+
+
+def load_compact_dataset(filepath=DATASET_PATH):
+    """
+    Return the process-wide compact dataset (rows from EARLIEST_YEAR onward).
+
+    Locations are dictionary-encoded categoricals, measurements float32 and
+    date parts small ints. The frame is shared by every tab and by training,
+    so callers must treat it as read-only and filter into views instead.
+    """
+    return _cached("dataset", filepath, lambda: _read_compact(ensure_dataset(filepath)))
+
+
+def load_locations(start_year=2020, filepath=DATASET_PATH):
+    """Unique (State, County, City) rows observed from start_year onward, sorted."""
+    def build():
+        from partitions import partitions_current, read_partitions
+
+        if partitions_current(filepath) and not _have_compact(filepath):
+            # Location columns of the start_year+ partitions only; no full dataset load
+            locs = read_partitions(start_year=start_year, columns=LOCATION_COLUMNS).drop_duplicates()
+        else:
+            df = load_compact_dataset(filepath)
+            locs = df.loc[df["Year"] >= start_year, LOCATION_COLUMNS].drop_duplicates()
+        for col in LOCATION_COLUMNS:
+            locs[col] = locs[col].cat.remove_unused_categories()
+        return locs.sort_values(LOCATION_COLUMNS).reset_index(drop=True)
+
+    return _cached("locations", filepath, build, start_year)
+
+
+def load_location_history(state, city, start_year=EARLIEST_YEAR, filepath=DATASET_PATH):
+    """Rows for one city, read from its State's partitions when the partitioned store is current."""
+    from partitions import partitions_current, read_partitions
+
+    if partitions_current(filepath) and not _have_compact(filepath):
+        df = read_partitions(states=[state], start_year=start_year, cities=[city])
+        df["Overall_AQI"] = df[AQI_COLUMNS].max(axis=1).astype("float32")
+        return df
+    df = load_compact_dataset(filepath)
+    return df[(df["State"] == state) & (df["City"] == city) & (df["Year"] >= start_year)]
+
+
+def memory_report(df):
+    """Per-column dtype and deep memory usage (MB) of a table."""
+    usage = df.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        "Column": usage.index,
+        "Dtype": [str(df[c].dtype) for c in usage.index],
+        "MB": usage.values / 1024 ** 2,
+    })
+    total = pd.DataFrame([{"Column": "TOTAL", "Dtype": "", "MB": report["MB"].sum()}])
+    return pd.concat([report, total], ignore_index=True)
+
+
+if __name__ == "__main__":
+    pd.set_option("display.float_format", "{:.2f}".format)
+
+    tables = {
+        "dataset": load_compact_dataset(),
+        "locations (2020+)": load_locations(),
+    }
+    for name, table in tables.items():
+        print(f"\n📦 {name}: {len(table):,} rows")
+        print(memory_report(table).to_string(index=False))
+
+    # Reference: the wide frame the tabs and training used to hold separately
+    wide = pd.read_csv(DATASET_PATH)
+    wide_mb = wide.memory_usage(deep=True).sum() / 1024 ** 2
+    compact_mb = memory_report(tables["dataset"])["MB"].iloc[-1]
+    print(f"\n📊 Full wide CSV frame: {wide_mb:.2f} MB | compact shared frame: {compact_mb:.2f} MB")
@@ -0,0 +1,198 @@
+import os
+import hashlib
+import contextlib
+import urllib.error
+import urllib.request
+import gdown
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+DRIVE_URL = "https://drive.google.com/uc?id=1aYtfI7ZnJFUwVoxsWj-9s2TVUOIL0vCW"
+
+# Overridable so a mirror or a local file server can stand in for Google Drive
+DATASET_URL = os.getenv("AQI_DATASET_URL", DRIVE_URL)
+DATASET_SHA256 = os.getenv("AQI_DATASET_SHA256") or None
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class ChecksumError(Exception):
+    pass
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """Exclusive cross-process lock held on a sidecar file for the duration of the block."""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def sha256sum(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def remote_size(url):
+    """Content-Length from a HEAD request, or None if the server doesn't say (or can't be reached)."""
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, method="HEAD")) as response:
+            length = response.headers.get("Content-Length")
+    except (urllib.error.URLError, OSError, ValueError):
+        return None
+    return int(length) if length and length.isdigit() else None
+
+
+def _total_from_content_range(header):
+    """Total size from "bytes 0-99/1234" or "bytes */1234", else None."""
+    total = (header or "").rpartition("/")[2]
+    return int(total) if total.isdigit() else None
+
+
+def _download_resumable(url, part_path):
+    """Continue part_path from its current size with an HTTP Range request; check the final size."""
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    request = urllib.request.Request(url)
+    if offset:
+        request.add_header("Range", f"bytes={offset}-")
+
+    try:
+        response = urllib.request.urlopen(request)
+    except urllib.error.HTTPError as e:
+        if e.code != 416:
+            raise
+        # Range not satisfiable: complete only if the part is exactly the remote size
+        total = _total_from_content_range(e.headers.get("Content-Range")) or remote_size(url)
+        if total is not None and total == offset:
+            return
+        os.remove(part_path)   # larger than the remote file, or size unknown: start over
+        return _download_resumable(url, part_path)
+
+    with response:
+        # 206 = server honoured the range; anything else restarts from scratch
+        resumed = offset and getattr(response, "status", None) == 206
+        if resumed:
+            expected = _total_from_content_range(response.headers.get("Content-Range"))
+        else:
+            length = response.headers.get("Content-Length")
+            expected = int(length) if length and length.isdigit() else None
+        with open(part_path, "ab" if resumed else "wb") as f:
+            for chunk in iter(lambda: response.read(CHUNK_SIZE), b""):
+                f.write(chunk)
+
+    size = os.path.getsize(part_path)
+    if expected is not None and size != expected:
+        # Connection dropped mid-body; the part file is kept so the next call resumes it
+        raise IOError(f"{url}: download stopped at {size} of {expected} bytes")
+
+
+def _download_gdown(url, part_path):
+    """
+    Resume part_path through gdown, which needs its own file naming.
+
+    gdown returns without downloading when its output file already exists
+    and resumes from a single "<output>*.part" file next to it, so our part
+    file is handed over under that name and the output path never exists
+    before the call.
+    """
+    output = part_path[:-len(".part")] + ".gdown"
+    folder, prefix = os.path.dirname(output) or ".", os.path.basename(output)
+    partials = [os.path.join(folder, f) for f in os.listdir(folder) if f.startswith(prefix) and f.endswith(".part")]
+    if os.path.exists(output):
+        os.remove(output)   # left by a crash before the rename below; never trusted as complete
+    if os.path.exists(part_path):
+        for partial in partials:
+            os.remove(partial)   # gdown refuses to pick between several
+        os.replace(part_path, output + ".part")
+    gdown.download(url, output, quiet=False, resume=True)
+    os.replace(output, part_path)
+
+
+def _download(url, part_path):
+    if "drive.google.com" in url:
+        _download_gdown(url, part_path)
+    else:
+        _download_resumable(url, part_path)
+
+
+def _verified(path, expected_sha256):
+    """Digest recorded next to a completed download, checked against the expected one."""
+    sidecar = path + ".sha256"
+    if not os.path.exists(sidecar):
+        return False
+    with open(sidecar) as f:
+        recorded = f.read().strip()
+    return expected_sha256 is None or recorded == expected_sha256
+
+
+def _complete_copy(path, url):
+    """
+    Whether an unverified existing file looks complete: its size must match
+    the remote Content-Length. When the server gives no size (offline, or
+    Google Drive), fall back to the file ending on a newline, since the CSV
+    always does and an interrupted download almost never stops exactly there.
+    """
+    # Drive answers HEAD with a redirect page, not the file's size
+    size = None if "drive.google.com" in url else remote_size(url)
+    if size is not None:
+        return os.path.getsize(path) == size
+    with open(path, "rb") as f:
+        f.seek(max(os.path.getsize(path) - 1, 0))
+        return f.read(1) == b"\n"
+
+
+def fetch_file(dest, url=DATASET_URL, sha256=DATASET_SHA256):
+    """
+    Make sure dest holds a complete copy of url and return its path.
+
+    One process downloads while the others wait on the lock and then reuse
+    its result. Data goes to dest + ".part" (resumed after an interruption),
+    is checked against the expected size and against sha256 when one is
+    configured, and only then renamed over dest, so a truncated file is
+    never visible at the final path. Without a configured sha256, an older
+    unverified copy is only adopted if it looks complete; otherwise the
+    download resumes from it.
+    """
+    if os.path.exists(dest) and _verified(dest, sha256):
+        return dest
+
+    os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+    with file_lock(dest + ".lock"):
+        if os.path.exists(dest) and _verified(dest, sha256):
+            return dest  # another process finished while we waited
+
+        part_path = dest + ".part"
+        if os.path.exists(dest) and sha256 is None and _complete_copy(dest, url):
+            # Pre-existing copy from before checksums were recorded; adopt it
+            digest = sha256sum(dest)
+        else:
+            if os.path.exists(dest) and not os.path.exists(part_path):
+                os.replace(dest, part_path)   # unverified or truncated copy: resume from it
+            _download(url, part_path)
+            digest = sha256sum(part_path)
+            if sha256 is not None and digest != sha256:
+                os.remove(part_path)
+                raise ChecksumError(f"{url}: expected sha256 {sha256}, got {digest}")
+            os.replace(part_path, dest)
+
+        with open(dest + ".sha256", "w") as f:
+            f.write(digest + "\n")
+    return dest
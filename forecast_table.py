@@ -0,0 +1,147 @@
+import os
+import time
+import argparse
+import threading
+import tempfile
+import numpy as np
+import pandas as pd
+from data_store import LOCATION_COLUMNS, load_locations
+from model_store import MODEL_DIR, interval_targets, load_model
+from sharded_model import ShardedModel, shards_exist
+
+FORECAST_PATH = "models/forecast_table.npz"
+DEFAULT_HORIZON_DAYS = 7
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+class ForecastTable:
+    """Precomputed predictions indexed by (State, County, City) and day offset."""
+
+    def __init__(self, states, counties, cities, start_date, values, targets, bounds=None):
+        locations = zip(states.tolist(), counties.tolist(), cities.tolist())
+        self.index = {loc: i for i, loc in enumerate(locations)}
+        self.start_date = pd.Timestamp(start_date).normalize()
+        self.values = values
+        self.bounds = bounds   # (2, locations, days, interval targets) lower/upper, or None for older tables
+        self.targets = list(targets)
+
+    @property
+    def horizon_days(self):
+        return self.values.shape[1]
+
+    def _cell(self, state, county, city, date):
+        i = self.index.get((state, county, city))
+        day = (pd.Timestamp(date).normalize() - self.start_date).days
+        if i is None or not 0 <= day < self.horizon_days:
+            return None
+        return i, day
+
+    def lookup(self, state, county, city, date):
+        """Predicted metrics for one location and date, or None on a miss."""
+        cell = self._cell(state, county, city, date)
+        if cell is None:
+            return None
+        return dict(zip(self.targets, self.values[cell].tolist()))
+
+    def lookup_interval(self, state, county, city, date):
+        """{interval target: (lower, upper)} for one location and date, or None on a miss."""
+        cell = self._cell(state, county, city, date)
+        if cell is None or self.bounds is None:
+            return None
+        lower, upper = self.bounds[(slice(None),) + cell].tolist()
+        # Tables built before the Overall AQI band have one bound column per target only
+        names = interval_targets(self.targets)[:len(lower)]
+        return dict(zip(names, zip(lower, upper)))
+
+
+def build_forecast_table(model, start_date=None, horizon_days=DEFAULT_HORIZON_DAYS):
+    """Predict every known location for horizon_days dates (with interval bounds) in one batch."""
+    start = pd.Timestamp(start_date or pd.Timestamp.today()).normalize()
+    dates = pd.date_range(start, periods=horizon_days, freq="D")
+    locs = load_locations(start_year=2020)
+
+    # Location-major grid: row i * horizon_days + d is location i on day d
+    grid = locs.loc[locs.index.repeat(horizon_days), LOCATION_COLUMNS].reset_index(drop=True)
+    grid["Year"] = np.tile(dates.year, len(locs))
+    grid["Month"] = np.tile(dates.month, len(locs))
+    grid["Day"] = np.tile(dates.day, len(locs))
+
+    preds, lower, upper = model.predict_interval(grid[["Year", "Month", "Day"] + LOCATION_COLUMNS])
+    values = preds.astype(np.float32).reshape(len(locs), horizon_days, -1)
+    bounds = np.stack([lower, upper]).astype(np.float32).reshape(2, len(locs), horizon_days, -1)
+    return locs, start, values, bounds
+
+
+def save_forecast_table(locs, start, values, targets, path=FORECAST_PATH, bounds=None):
+    """Write the table atomically so the app never reads a partial file."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".npz")
+    extra = {"bounds": bounds} if bounds is not None else {}
+    with os.fdopen(fd, "wb") as f:
+        np.savez(
+            f,
+            states=np.asarray(locs["State"], dtype=str),
+            counties=np.asarray(locs["County"], dtype=str),
+            cities=np.asarray(locs["City"], dtype=str),
+            start_date=np.array(start.strftime("%Y-%m-%d")),
+            values=values,
+            targets=np.array(targets),
+            **extra,
+        )
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_forecast_table(path=FORECAST_PATH):
+    """Cached table, reloaded whenever the job rewrites the file; None if not built."""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is None or cached[0] != mtime:
+            with np.load(path) as data:
+                table = ForecastTable(
+                    data["states"], data["counties"], data["cities"],
+                    str(data["start_date"]), data["values"], data["targets"],
+                    data["bounds"] if "bounds" in data.files else None,
+                )
+            _cache[path] = cached = (mtime, table)
+        return cached[1]
+
+
+def lookup_forecast(state, county, city, date, path=FORECAST_PATH):
+    table = load_forecast_table(path)
+    return table.lookup(state, county, city, date) if table is not None else None
+
+
+def lookup_forecast_interval(state, county, city, date, path=FORECAST_PATH):
+    table = load_forecast_table(path)
+    return table.lookup_interval(state, county, city, date) if table is not None else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Precompute predictions for every location (run daily, e.g. from cron)."
+    )
+    parser.add_argument("--days", type=int, default=DEFAULT_HORIZON_DAYS, help="rolling horizon from today")
+    parser.add_argument("--start-date", default=None, help="first forecast date (default: today)")
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--output", default=FORECAST_PATH)
+    parser.add_argument("--sharded", action="store_true", default=shards_exist(),
+                        help="use the per-State shards (default when they have been trained)")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    model = ShardedModel() if args.sharded else load_model(args.model_dir)
+    locs, start, values, bounds = build_forecast_table(model, args.start_date, args.days)
+    save_forecast_table(locs, start, values, model.targets, args.output, bounds)
+    elapsed = time.perf_counter() - t0
+
+    size_mb = os.path.getsize(args.output) / 1024 ** 2
+    print(f"✅ {len(locs):,} locations × {args.days} days from {start:%Y-%m-%d}")
+    print(f"⏱️ Build time: {elapsed:.2f} s | 💾 Table size: {size_mb:.2f} MB -> {args.output}")
@@ -0,0 +1,200 @@
+import os
+import sys
+import time
+import argparse
+import resource
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from data_store import DATASET_PATH, LOCATION_COLUMNS, POLLUTANT_TARGETS, ensure_dataset, load_compact_dataset
+from model_store import save_model, load_model
+from train_model import FEATURE_COLUMNS, build_pipeline, evaluate_model
+
+DEFAULT_ROWS_PER_LOCATION = 2000
+DEFAULT_CHUNK_ROWS = 200_000
+HOLDOUT_PERCENT = 20
+
+_VALUE_COLUMNS = ["Year", "Month", "Day"] + POLLUTANT_TARGETS
+
+
+class LocationReservoir:
+    """
+    Uniform sample of at most k rows per (State, County, City), fed chunk by chunk.
+
+    Algorithm R per location: the first k rows fill the reservoir, row n
+    after that replaces a random slot with probability k / (n + 1). Memory
+    is bounded by locations × k × columns, whatever the history length.
+    """
+
+    def __init__(self, k, n_columns, seed=42):
+        self.k = k
+        self.n_columns = n_columns
+        self.rng = np.random.default_rng(seed)
+        self.index = {}
+        self.seen = []
+        self.buffers = []
+
+    def add(self, locations, values):
+        """locations: DataFrame of LOCATION_COLUMNS; values: float32 array with one row per location row."""
+        codes, uniques = pd.MultiIndex.from_frame(locations).factorize()
+        order = np.argsort(codes, kind="stable")   # keeps file order within a location
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(uniques)))])
+        for u, key in enumerate(uniques):
+            self._add_location(key, values[order[bounds[u]:bounds[u + 1]]])
+
+    def _add_location(self, key, rows):
+        i = self.index.get(key)
+        if i is None:
+            i = self.index[key] = len(self.buffers)
+            self.buffers.append(np.empty((self.k, self.n_columns), dtype=np.float32))
+            self.seen.append(0)
+
+        buffer = self.buffers[i]
+        position = self.seen[i] + np.arange(len(rows))
+        fill = position < self.k
+        buffer[position[fill]] = rows[fill]
+
+        slot = self.rng.integers(0, position[~fill] + 1)
+        replace = slot < self.k
+        # Fancy assignment applies in order, so a later row wins a contested slot, as in the sequential algorithm
+        buffer[slot[replace]] = rows[~fill][replace]
+        self.seen[i] += len(rows)
+
+    def to_frame(self, value_columns):
+        parts = []
+        for key, i in self.index.items():
+            n = min(self.seen[i], self.k)
+            part = pd.DataFrame(self.buffers[i][:n], columns=value_columns)
+            for col, value in zip(LOCATION_COLUMNS, key):
+                part[col] = value
+            parts.append(part)
+        return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=value_columns + LOCATION_COLUMNS)
+
+
+def holdout_mask(df):
+    """Deterministic ~HOLDOUT_PERCENT% of rows by hash of location and date (same rows in every loader)."""
+    key = df["State"].astype(str) + "|" + df["County"].astype(str) + "|" + df["City"].astype(str) \
+        + "|" + df["Date"].dt.strftime("%Y-%m-%d")
+    return pd.util.hash_array(key.to_numpy(dtype=object)) % 100 < HOLDOUT_PERCENT
+
+
+def sample_history(filepath=DATASET_PATH, rows_per_location=DEFAULT_ROWS_PER_LOCATION,
+                   chunk_rows=DEFAULT_CHUNK_ROWS, start_year=None, split="all", seed=42):
+    """
+    Stream the raw CSV in chunks into a per-location reservoir sample.
+
+    split="train" skips holdout rows, split="test" keeps only them. Missing
+    values are filled with the sample's medians at the end, and duplicates
+    are dropped within each chunk. Returns (X, y) shaped like
+    load_training_data().
+    """
+    reservoir = LocationReservoir(rows_per_location, len(_VALUE_COLUMNS), seed)
+    chunks = pd.read_csv(
+        ensure_dataset(filepath),
+        usecols=["Date"] + LOCATION_COLUMNS + POLLUTANT_TARGETS,
+        dtype={**{c: str for c in LOCATION_COLUMNS}, **{c: "float32" for c in POLLUTANT_TARGETS}},
+        parse_dates=["Date"],
+        chunksize=chunk_rows,
+    )
+    for chunk in chunks:
+        chunk = chunk.drop_duplicates()
+        if start_year is not None:
+            chunk = chunk[chunk["Date"].dt.year >= start_year]
+        if split != "all":
+            mask = holdout_mask(chunk)
+            chunk = chunk[mask if split == "test" else ~mask]
+        if chunk.empty:
+            continue
+        values = np.column_stack([
+            chunk["Date"].dt.year, chunk["Date"].dt.month, chunk["Date"].dt.day,
+            chunk[POLLUTANT_TARGETS].to_numpy(),
+        ]).astype(np.float32)
+        reservoir.add(chunk[LOCATION_COLUMNS], values)
+
+    df = reservoir.to_frame(_VALUE_COLUMNS)
+    df[POLLUTANT_TARGETS] = df[POLLUTANT_TARGETS].fillna(df[POLLUTANT_TARGETS].median())
+    df = df.astype({"Year": "int16", "Month": "int8", "Day": "int8"})
+    return df[FEATURE_COLUMNS], df[POLLUTANT_TARGETS]
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def _train_variant(variant, model_dir, rows_per_location, chunk_rows, params):
+    """Worker (fresh process, so peak RSS is this variant's own): fit and publish one model."""
+    t0 = time.perf_counter()
+    if variant == "full_history":
+        X_train, y_train = sample_history(rows_per_location=rows_per_location, chunk_rows=chunk_rows, split="train")
+    else:
+        df = load_compact_dataset()
+        df = df[(df["Year"] >= 2020) & ~holdout_mask(df)]
+        X_train, y_train = df[FEATURE_COLUMNS], df[POLLUTANT_TARGETS]
+    load_s = time.perf_counter() - t0
+    load_peak_mb = peak_rss_mb()
+
+    pipeline = build_pipeline(**params)
+    pipeline.fit(X_train, y_train)
+    save_model(pipeline, model_dir)
+    return {
+        "model": variant,
+        "train_rows": len(X_train),
+        "years": f"{X_train['Year'].min()}–{X_train['Year'].max()}",
+        "load_s": load_s,
+        "wall_s": time.perf_counter() - t0,
+        "load_peak_rss_mb": load_peak_mb,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def compare_with_recent(rows_per_location=DEFAULT_ROWS_PER_LOCATION, chunk_rows=DEFAULT_CHUNK_ROWS, **params):
+    """
+    Train the 2020-only model and the full-history sample model on the same
+    non-holdout rows, each in its own process, and score both on the
+    2020+ holdout rows.
+    """
+    X_test, y_test = sample_history(rows_per_location=rows_per_location, chunk_rows=chunk_rows,
+                                    start_year=2020, split="test")
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for variant in ("recent_2020", "full_history"):
+            model_dir = os.path.join(tmp, variant)
+            # One fresh (spawned, not forked) process per variant: ru_maxrss can't be reset
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                row = pool.submit(_train_variant, variant, model_dir, rows_per_location, chunk_rows, params).result()
+            metrics = evaluate_model(load_model(model_dir), X_test, y_test)
+            row.update({"mae": metrics["mae"], "rmse": metrics["rmse"], "r2": metrics["r2"]})
+            rows.append(row)
+    return pd.DataFrame(rows), len(X_test)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Bounded-memory training on the full 2000–2023 history (per-location reservoir sample)."
+    )
+    parser.add_argument("--rows-per-location", type=int, default=DEFAULT_ROWS_PER_LOCATION)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="CSV rows read per chunk")
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--max-depth", type=int, default=None)
+    parser.add_argument("--min-samples-leaf", type=int, default=1)
+    parser.add_argument("--compare", action="store_true", help="also train both models and compare them")
+    args = parser.parse_args()
+
+    if args.compare:
+        params = {
+            "n_estimators": args.n_estimators,
+            "max_depth": args.max_depth,
+            "min_samples_leaf": args.min_samples_leaf,
+        }
+        report, n_test = compare_with_recent(args.rows_per_location, args.chunk_rows, **params)
+        print(f"\n📊 2020-only vs full-history model ({n_test:,} held-out 2020+ rows):")
+        print(report.to_string(index=False, float_format="{:.3f}".format))
+    else:
+        t0 = time.perf_counter()
+        X_train, y_train = sample_history(rows_per_location=args.rows_per_location, chunk_rows=args.chunk_rows)
+        print(f"✅ Sampled {len(X_train):,} rows from {X_train[LOCATION_COLUMNS].drop_duplicates().shape[0]:,} "
+              f"locations over {X_train['Year'].min()}–{X_train['Year'].max()} "
+              f"in {time.perf_counter() - t0:.1f} s (peak RSS {peak_rss_mb():.0f} MB)")
@@ -0,0 +1,206 @@
+import os
+import time
+import uuid
+import argparse
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import numpy as np
+
+DEFAULT_THREADS = 8
+DEFAULT_PROCESSES = 2
+JOB_TTL_S = 3600
+
+
+def _timed_call(fn, args, kwargs):
+    """Runs in the worker; wall-clock start/end so process jobs report latency too."""
+    started = time.time()
+    result = fn(*args, **kwargs)
+    return started, time.time(), result
+
+
+class Job:
+    """One submitted unit of work; the UI keeps only its id across reruns."""
+
+    def __init__(self, job_id, kind, pool, future=None):
+        self.id = job_id
+        self.kind = kind
+        self.pool = pool
+        self.future = future
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.progress = 0.0
+        self.message = ""
+        self.result = None
+        self.error = None
+
+    @property
+    def status(self):
+        if self.future.done():
+            return "failed" if self.error is not None else "done"
+        return "running" if self.started_at is not None or self.future.running() else "queued"
+
+    @property
+    def finished(self):
+        return self.future.done()
+
+    def update(self, progress, message=""):
+        """Progress callback for thread-pool jobs (0..1)."""
+        if self.started_at is None:
+            self.started_at = time.time()
+        self.progress = progress
+        self.message = message
+
+
+class JobExecutor:
+    """
+    Process-wide background executor shared by every session.
+
+    I/O-bound work (Gemini, SMTP) goes to a bounded thread pool, CPU-bound
+    work (PDF rendering) to a bounded process pool, so neither blocks the
+    Streamlit script thread. Jobs outlive the rerun that submitted them;
+    sessions poll them by id. Finished jobs are kept for JOB_TTL_S.
+    """
+
+    def __init__(self, threads=DEFAULT_THREADS, processes=DEFAULT_PROCESSES):
+        self.threads = threads
+        self.processes = processes
+        self._pools = {"thread": ThreadPoolExecutor(max_workers=threads, thread_name_prefix="job")}
+        if processes > 0:
+            # spawn, not fork: the server process is multi-threaded
+            self._pools["process"] = ProcessPoolExecutor(
+                max_workers=processes, mp_context=multiprocessing.get_context("spawn")
+            )
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._latency = {}   # kind -> deque of (queue wait s, run time s)
+
+    def submit(self, kind, fn, *args, pool="thread", progress=False, **kwargs):
+        """
+        Queue fn(*args, **kwargs) and return the job id.
+
+        With progress=True (thread pool only) fn also receives progress=job.update.
+        Without a process pool, process jobs run on the thread pool.
+        """
+        if pool == "process" and "process" not in self._pools:
+            pool = "thread"
+        job = Job(uuid.uuid4().hex[:12], kind, pool)
+        if progress:
+            kwargs["progress"] = job.update
+
+        self._prune()
+        with self._lock:
+            self._jobs[job.id] = job
+            job.future = self._pools[pool].submit(_timed_call, fn, args, kwargs)
+        job.future.add_done_callback(lambda future: self._finish(job, future))
+        return job.id
+
+    def _finish(self, job, future):
+        try:
+            started, finished, job.result = future.result()
+            job.started_at, job.finished_at = started, finished
+            job.progress = 1.0
+        except Exception as e:
+            job.error = e
+            job.finished_at = time.time()
+            job.started_at = job.started_at or job.finished_at
+        with self._lock:
+            self._latency.setdefault(job.kind, deque(maxlen=1000)).append(
+                (job.started_at - job.submitted_at, job.finished_at - job.started_at)
+            )
+
+    def _prune(self):
+        cutoff = time.time() - JOB_TTL_S
+        with self._lock:
+            for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished_at and j.finished_at < cutoff]:
+                del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def metrics(self):
+        """Queue depth and running jobs per pool, plus wait/run percentiles (s) per job kind."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+            latency = {kind: np.array(samples) for kind, samples in self._latency.items()}
+
+        pools = {}
+        for name in self._pools:
+            statuses = [j.status for j in jobs if j.pool == name]
+            pools[name] = {
+                "workers": self.threads if name == "thread" else self.processes,
+                "queued": statuses.count("queued"),
+                "running": statuses.count("running"),
+            }
+        kinds = {
+            kind: {
+                "completed": len(samples),
+                "wait_p50_s": float(np.percentile(samples[:, 0], 50)),
+                "wait_p95_s": float(np.percentile(samples[:, 0], 95)),
+                "run_p50_s": float(np.percentile(samples[:, 1], 50)),
+                "run_p95_s": float(np.percentile(samples[:, 1], 95)),
+            }
+            for kind, samples in latency.items() if len(samples)
+        }
+        return {"pools": pools, "kinds": kinds}
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Shared executor for this server process (sizes from JOB_THREADS / JOB_PROCESSES)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = JobExecutor(
+                threads=int(os.getenv("JOB_THREADS", DEFAULT_THREADS)),
+                processes=int(os.getenv("JOB_PROCESSES", DEFAULT_PROCESSES)),
+            )
+        return _executor
+
+
+def _simulated_io(seconds, steps=5, progress=None):
+    for i in range(steps):
+        time.sleep(seconds / steps)
+        progress((i + 1) / steps, f"step {i + 1}/{steps}")
+    return seconds
+
+
+def _simulated_cpu(n):
+    return sum(i * i for i in range(n))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drive the job executor with a burst of jobs and report pool metrics.")
+    parser.add_argument("--threads", type=int, default=DEFAULT_THREADS)
+    parser.add_argument("--processes", type=int, default=DEFAULT_PROCESSES)
+    parser.add_argument("--io-jobs", type=int, default=50, help="simulated Gemini/SMTP jobs")
+    parser.add_argument("--io-seconds", type=float, default=0.5)
+    parser.add_argument("--cpu-jobs", type=int, default=10, help="simulated PDF jobs")
+    parser.add_argument("--cpu-work", type=int, default=3_000_000)
+    args = parser.parse_args()
+
+    executor = JobExecutor(args.threads, args.processes)
+    t0 = time.perf_counter()
+    ids = [executor.submit("io", _simulated_io, args.io_seconds, progress=True) for _ in range(args.io_jobs)]
+    ids += [executor.submit("cpu", _simulated_cpu, args.cpu_work, pool="process") for _ in range(args.cpu_jobs)]
+
+    peak = {}
+    while not all(executor.get(i).finished for i in ids):
+        for name, pool in executor.metrics()["pools"].items():
+            peak[name] = max(peak.get(name, 0), pool["queued"])
+        time.sleep(0.05)
+    time.sleep(0.1)   # let done-callbacks record latency
+
+    print(f"✅ {len(ids)} jobs in {time.perf_counter() - t0:.2f} s "
+          f"({args.threads} threads, {args.processes} processes)")
+    for name, depth in peak.items():
+        print(f"📥 {name} pool: peak queue depth {depth}")
+    for kind, m in executor.metrics()["kinds"].items():
+        print(f"⏱️ {kind}: {m['completed']} done | wait p50 {m['wait_p50_s']:.2f} s, p95 {m['wait_p95_s']:.2f} s | "
+              f"run p50 {m['run_p50_s']:.2f} s, p95 {m['run_p95_s']:.2f} s")
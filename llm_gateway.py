@@ -0,0 +1,267 @@
+import os
+import re
+import time
+import hashlib
+import argparse
+import threading
+from collections import deque
+import numpy as np
+
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_RATE_PER_S = 1.0
+DEFAULT_BURST = 5
+DEFAULT_QUEUE_TIMEOUT_S = 30.0
+DEFAULT_MAX_RETRIES = 3
+
+
+class TokenBucket:
+    """Blocking token bucket: `rate` tokens per second, at most `capacity` saved up."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("Timed out waiting for an LLM rate-limit token")
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution."""
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """Run fn() unless a call for key is already in flight; returns (result, shared)."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = fn()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result, False
+
+
+def is_rate_limit_error(error):
+    """HTTP 429 / quota errors from the Gemini client (google.api_core ResourceExhausted) or the fake."""
+    return getattr(error, "code", None) == 429 or type(error).__name__ in ("ResourceExhausted", "TooManyRequests")
+
+
+def prompt_key(prompt):
+    """Identical prompts up to case and whitespace share one upstream call."""
+    return hashlib.sha256(re.sub(r"\s+", " ", prompt.strip().lower()).encode()).hexdigest()
+
+
+class LLMGateway:
+    """
+    Process-wide front door for upstream LLM calls.
+
+    Identical concurrent prompts are coalesced into one call, at most
+    max_concurrency calls run at once, starts are paced by a token bucket,
+    and upstream rate-limit errors are retried with exponential backoff.
+    Time spent waiting for a slot and a token is recorded as queue time.
+    """
+
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY, rate_per_s=DEFAULT_RATE_PER_S,
+                 burst=DEFAULT_BURST, queue_timeout=DEFAULT_QUEUE_TIMEOUT_S,
+                 max_retries=DEFAULT_MAX_RETRIES, backoff_s=0.5):
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.backoff_s = backoff_s
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._bucket = TokenBucket(rate_per_s, burst)
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._queue_waits = deque(maxlen=1000)
+        self._counts = {"requests": 0, "coalesced": 0, "upstream_calls": 0,
+                        "rate_limited": 0, "failed": 0, "waiting": 0, "in_flight": 0}
+
+    def _count(self, name, delta=1):
+        with self._lock:
+            self._counts[name] += delta
+
+    def _call_upstream(self, call, t_request):
+        deadline = t_request + self.queue_timeout
+        self._count("waiting")
+        try:
+            if not self._slots.acquire(timeout=self.queue_timeout):
+                raise TimeoutError("Timed out waiting for an LLM concurrency slot")
+            try:
+                self._bucket.acquire(timeout=max(deadline - time.monotonic(), 0))
+            except TimeoutError:
+                self._slots.release()
+                raise
+        finally:
+            self._count("waiting", -1)
+
+        with self._lock:
+            self._queue_waits.append(time.monotonic() - t_request)
+            self._counts["in_flight"] += 1
+        try:
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    self._bucket.acquire(timeout=self.queue_timeout)
+                self._count("upstream_calls")
+                try:
+                    return call()
+                except Exception as e:
+                    if not is_rate_limit_error(e) or attempt == self.max_retries:
+                        raise
+                    self._count("rate_limited")
+                    time.sleep(self.backoff_s * 2 ** attempt)
+        finally:
+            self._count("in_flight", -1)
+            self._slots.release()
+
+    def generate(self, prompt, call):
+        """Return call()'s result for prompt, sharing one upstream call with identical in-flight prompts."""
+        self._count("requests")
+        t_request = time.monotonic()
+        try:
+            result, shared = self._flight.do(prompt_key(prompt), lambda: self._call_upstream(call, t_request))
+        except Exception:
+            self._count("failed")
+            raise
+        if shared:
+            self._count("coalesced")
+        return result
+
+    def metrics(self):
+        """Counters plus queue-time percentiles (seconds) over the last 1000 upstream calls."""
+        with self._lock:
+            snapshot = dict(self._counts)
+            waits = np.array(self._queue_waits)
+        snapshot["queue_p50_s"] = float(np.percentile(waits, 50)) if len(waits) else 0.0
+        snapshot["queue_p95_s"] = float(np.percentile(waits, 95)) if len(waits) else 0.0
+        snapshot["queue_max_s"] = float(waits.max()) if len(waits) else 0.0
+        return snapshot
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """Shared gateway for every session in this process (limits from LLM_* environment variables)."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway(
+                max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)),
+                rate_per_s=float(os.getenv("LLM_RATE_PER_S", DEFAULT_RATE_PER_S)),
+                burst=int(os.getenv("LLM_BURST", DEFAULT_BURST)),
+                queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT_S", DEFAULT_QUEUE_TIMEOUT_S)),
+            )
+        return _gateway
+
+
+def simulate_surge(sessions=200, distinct_questions=3, latency=1.0, quota_rps=2.0, use_gateway=True,
+                   **gateway_args):
+    """
+    Smoke-event surge against the fake Gemini model: `sessions` users ask one
+    of a few questions at the same moment. Returns gateway metrics plus
+    end-to-end latency and how many calls the fake upstream rejected.
+    With use_gateway=False every session calls the model directly (baseline).
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from loadtest import FakeGenerativeModel
+
+    FakeGenerativeModel.configure(latency=latency, quota_rps=quota_rps)
+    model = FakeGenerativeModel("gemini-2.5-flash")
+    gateway = LLMGateway(**gateway_args)
+    questions = [f"Is it safe to go outside today? (variant {i})" for i in range(distinct_questions)]
+    start = threading.Barrier(sessions)
+
+    def user(i):
+        prompt = questions[i % distinct_questions]
+        start.wait()
+        t0 = time.monotonic()
+        try:
+            if use_gateway:
+                gateway.generate(prompt, lambda: model.generate_content(prompt).text)
+            else:
+                model.generate_content(prompt)
+            return time.monotonic() - t0, None
+        except Exception as e:
+            return time.monotonic() - t0, e
+
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        results = list(pool.map(user, range(sessions)))
+
+    latencies = np.array([t for t, _ in results])
+    report = gateway.metrics()
+    report.update({
+        "sessions": sessions,
+        "errors": sum(e is not None for _, e in results),
+        "upstream_rejections": FakeGenerativeModel.rejected,
+        "latency_p50_s": float(np.percentile(latencies, 50)),
+        "latency_max_s": float(latencies.max()),
+    })
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Simulate a surge of advisor questions against a fake rate-limited Gemini model."
+    )
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--questions", type=int, default=3, help="distinct questions among the sessions")
+    parser.add_argument("--latency", type=float, default=1.0, help="fake model latency (s)")
+    parser.add_argument("--quota", type=float, default=2.0, help="fake upstream quota (calls/s) before 429s")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE_PER_S, help="token bucket rate (calls/s)")
+    parser.add_argument("--burst", type=int, default=DEFAULT_BURST)
+    parser.add_argument("--no-gateway", action="store_true", help="baseline: every session calls the model directly")
+    args = parser.parse_args()
+
+    r = simulate_surge(args.sessions, args.questions, args.latency, args.quota, not args.no_gateway,
+                       max_concurrency=args.concurrency, rate_per_s=args.rate, burst=args.burst)
+    if args.no_gateway:
+        r["requests"] = r["upstream_calls"] = r["sessions"]
+    print(f"🚦 {r['sessions']} sessions | {r['requests']} requests -> {r['upstream_calls']} upstream calls "
+          f"({r['coalesced']} coalesced)")
+    print(f"⏳ Queue time p50 {r['queue_p50_s']:.2f} s | p95 {r['queue_p95_s']:.2f} s | max {r['queue_max_s']:.2f} s")
+    print(f"⏱️ End-to-end p50 {r['latency_p50_s']:.2f} s | max {r['latency_max_s']:.2f} s")
+    print(f"🛑 {r['upstream_rejections']} upstream 429s ({r['rate_limited']} retried) | {r['errors']} failed requests")
@@ -0,0 +1,328 @@
+import os
+import sys
+import time
+import random
+import argparse
+import resource
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+# Step suffix for click-to-result times of background jobs (not single reruns)
+END_TO_END = " end-to-end"
+
+
+class FakeRateLimitError(Exception):
+    """What the fake upstream raises over quota (HTTP 429, like google.api_core's ResourceExhausted)."""
+
+    code = 429
+
+
+class FakeGenerativeModel:
+    """
+    Stand-in for genai.GenerativeModel: fixed answer after a simulated delay.
+
+    With quota_rps set, calls beyond that many per rolling second are
+    rejected with FakeRateLimitError, like an exhausted upstream quota.
+    """
+
+    latency = 0.2
+    quota_rps = None
+    rejected = 0
+    _starts = deque()
+    _lock = threading.Lock()
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    @classmethod
+    def configure(cls, latency=0.2, quota_rps=None):
+        with cls._lock:
+            cls.latency = latency
+            cls.quota_rps = quota_rps
+            cls.rejected = 0
+            cls._starts.clear()
+
+    def generate_content(self, prompt):
+        cls = type(self)
+        if cls.quota_rps is not None:
+            with cls._lock:
+                now = time.monotonic()
+                while cls._starts and now - cls._starts[0] >= 1.0:
+                    cls._starts.popleft()
+                if len(cls._starts) >= cls.quota_rps:
+                    cls.rejected += 1
+                    raise FakeRateLimitError("429 Resource has been exhausted (e.g. check quota).")
+                cls._starts.append(now)
+        time.sleep(cls.latency)
+        return type("Response", (), {"text": "Stay indoors during peak hours and keep windows closed."})()
+
+
+class FakeGenAI:
+    GenerativeModel = FakeGenerativeModel
+
+    @staticmethod
+    def configure(**kwargs):
+        pass
+
+
+class FakeSMTP:
+    """Stand-in for smtplib.SMTP that accepts everything and sends nothing."""
+
+    def __init__(self, host, port):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def starttls(self, context=None):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def sendmail(self, sender, to, msg):
+        pass
+
+
+def install_stubs(llm_latency=0.2):
+    """Replace the Gemini client and SMTP in the tab modules so nothing leaves the host."""
+    import tabs.advice_tab as advice_tab
+    import tabs.alerts_tab as alerts_tab
+
+    FakeGenerativeModel.configure(latency=llm_latency)
+    os.environ.setdefault("GEMINI_API_KEY", "load-test")
+    advice_tab.genai = FakeGenAI
+    alerts_tab.smtplib.SMTP = FakeSMTP
+
+
+def current_rss_mb():
+    """Resident set size of this process (falls back to peak RSS off Linux)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+class Session:
+    """One simulated user; every AppTest.run() is one timed rerun."""
+
+    def __init__(self, rng, timings, timeout, poll_seconds=0.25):
+        self.rng = rng
+        self.timings = timings
+        self.timeout = timeout
+        self.poll_seconds = poll_seconds
+        self.at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.at.secrets["SMTP_SERVER"] = "localhost"
+        self.at.secrets["SENDER_EMAIL"] = "alerts@example.com"
+        self.at.secrets["SENDER_PASS"] = "load-test"
+
+    def run(self, step):
+        t0 = time.perf_counter()
+        self.at.run()
+        self.timings.append((step, time.perf_counter() - t0))
+        if self.at.exception:
+            raise RuntimeError(f"{step}: {self.at.exception[0].value}")
+
+    def wait_for_job(self, step, session_key, t0):
+        """
+        Rerun like the status fragment's poll until the background job behind
+        session_key finishes, then once more to render its result. The time
+        from t0 (the submitting rerun's start) to the rendered result is
+        recorded as "<step> end-to-end".
+        """
+        from jobs import get_executor
+
+        deadline = time.monotonic() + self.timeout
+        while True:
+            job_id = self.at.session_state[session_key] if session_key in self.at.session_state else None
+            job = get_executor().get(job_id) if job_id else None
+            if job is None or job.finished:
+                break
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{step}: job still running after {self.timeout} s")
+            time.sleep(self.poll_seconds)
+            self.run(f"{step} (poll)")
+        self.run(f"{step} (result)")
+        if job is not None and job.error is not None:
+            raise RuntimeError(f"{step}: {job.error!r}")
+        self.timings.append((step + END_TO_END, time.perf_counter() - t0))
+
+    def _selectbox(self, label):
+        return next(s for s in self.at.selectbox if s.label == label)
+
+    def _button(self, text):
+        return next((b for b in self.at.button if text in b.label), None)
+
+    def open_view(self, label):
+        """Switch views when the app uses navigation widgets (all views render otherwise)."""
+        nav = [r for r in self.at.radio if r.key == "current_tab"]
+        if nav:
+            nav[0].set_value(label)
+            self.run(f"open {label}")
+
+    def flow(self, think_time):
+        self.run("initial load")
+        for label in ("🌎 Select State", "🏞️ Select County", "🏙️ Select City"):
+            box = self._selectbox(label)
+            box.set_value(self.rng.choice(box.options))
+            self.run(f"select {label.split()[-1].lower()}")
+            time.sleep(think_time)
+
+        self._button("Generate Prediction").click()
+        self.run("generate prediction")
+        time.sleep(think_time)
+
+        self.open_view("📊 Analytics")
+        pdf = self._button("Download PDF Report")
+        if pdf is not None:
+            t0 = time.perf_counter()
+            pdf.click()
+            self.run("download pdf")
+            self.wait_for_job("download pdf", "pdf_job", t0)
+            if not self.at.get("download_button"):
+                raise RuntimeError("download pdf: no download button after the job finished")
+        time.sleep(think_time)
+
+        self.open_view("💡 Advice")
+        ai = self._button("Get More Advice with AI")
+        if ai is not None:
+            ai.click()
+            self.run("open ai advisor")
+            if self.at.chat_input:
+                t0 = time.perf_counter()
+                self.at.chat_input[0].set_value("Is it safe to go jogging today?")
+                self.run("ask ai advisor")
+                self.wait_for_job("ask ai advisor", "advice_job", t0)
+                history = self.at.session_state["chat_history"]
+                if not history or history[-1]["role"] != "assistant":
+                    raise RuntimeError("ask ai advisor: no assistant answer after the job finished")
+
+
+# RSS of a worker process after its warm-up rerun (caches loaded), the baseline for growth
+_warm_rss_mb = None
+
+
+def _init_worker(llm_latency, timeout, seed):
+    """Per-process setup: stubs, then one warm-up rerun so dataset/model loads aren't timed."""
+    # Each user already has its own process; PDF jobs run on its threads instead of nested workers
+    os.environ.setdefault("JOB_PROCESSES", "0")
+    global _warm_rss_mb
+    install_stubs(llm_latency)
+    Session(random.Random(seed), [], timeout).run("warm-up")
+    _warm_rss_mb = current_rss_mb()
+
+
+def _user(i, iterations, think_time, timeout, seed, start):
+    """One simulated user in its own process; starts together with the others."""
+    start.wait()
+    timings, error = [], None
+    t_start = time.time()
+    try:
+        rng = random.Random(seed + i)
+        for _ in range(iterations):
+            Session(rng, timings, timeout).flow(think_time)
+    except Exception as e:
+        error = repr(e)
+    return timings, error, t_start, time.time(), _warm_rss_mb, current_rss_mb()
+
+
+def run_load_test(sessions=10, iterations=1, think_time=0.0, llm_latency=0.2, timeout=600, seed=0):
+    """
+    Drive `sessions` simulated users at once and summarise rerun latency.
+
+    AppTest keeps process-global runtime state, so two AppTests can't run
+    in one process at the same time. Each user therefore gets its own
+    process (like one replica serving one user) and the reruns really
+    overlap. Each process warms its own caches before the timed flows
+    start, and they all start together.
+    """
+    context = multiprocessing.get_context("spawn")
+    with context.Manager() as manager:
+        start = manager.Barrier(sessions)
+        with ProcessPoolExecutor(max_workers=sessions, mp_context=context, initializer=_init_worker,
+                                 initargs=(llm_latency, timeout, seed)) as pool:
+            futures = [pool.submit(_user, i, iterations, think_time, timeout, seed, start)
+                       for i in range(sessions)]
+            results = [f.result() for f in futures]
+
+    timings = [t for r in results for t in r[0]]
+    errors = [r[1] for r in results if r[1] is not None]
+    wall = max(r[3] for r in results) - min(r[2] for r in results)
+    warm_rss = np.array([r[4] for r in results])
+    rss = np.array([r[5] for r in results])
+
+    # Click-to-result times of background jobs span several reruns; keep them out of the rerun stats
+    end_to_end = {}
+    for step, t in timings:
+        if step.endswith(END_TO_END):
+            end_to_end.setdefault(step[:-len(END_TO_END)], []).append(t * 1000)
+    timings = [(step, t) for step, t in timings if not step.endswith(END_TO_END)]
+    latencies = np.array([t for _, t in timings]) * 1000
+    by_step = {}
+    for step, t in timings:
+        by_step.setdefault(step, []).append(t * 1000)
+
+    return {
+        "sessions": sessions,
+        "reruns": len(latencies),
+        "errors": errors,
+        "wall_s": wall,
+        "throughput_rps": len(latencies) / wall if wall else 0.0,
+        "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else 0.0,
+        "p90_ms": float(np.percentile(latencies, 90)) if len(latencies) else 0.0,
+        "p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else 0.0,
+        "mean_ms": float(latencies.mean()) if len(latencies) else 0.0,
+        "by_step_p50_ms": {step: float(np.median(v)) for step, v in by_step.items()},
+        "end_to_end_ms": {step: (float(np.median(v)), float(np.max(v))) for step, v in end_to_end.items()},
+        "rss_warm_mb": float(warm_rss.mean()),
+        "rss_per_session_mb": float(rss.mean()),
+        "rss_total_mb": float(rss.sum()),
+        "rss_growth_mb": float((rss - warm_rss).mean()),
+        "rss_growth_max_mb": float((rss - warm_rss).max()),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Headless concurrent-session load test of app.py (Gemini and SMTP stubbed)."
+    )
+    parser.add_argument("--sessions", type=int, default=10, help="concurrent simulated users")
+    parser.add_argument("--iterations", type=int, default=1, help="flows per user")
+    parser.add_argument("--think-time", type=float, default=0.0, help="seconds between user actions")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="simulated Gemini latency (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Through the module, so workers unpickle loadtest._user: AppTest replaces their __main__ with app.py
+    import loadtest
+    r = loadtest.run_load_test(args.sessions, args.iterations, args.think_time, args.llm_latency, seed=args.seed)
+    print(f"\n🚦 {r['sessions']} concurrent sessions (one process each) | {r['reruns']} reruns "
+          f"in {r['wall_s']:.1f} s ({r['throughput_rps']:.1f} reruns/s on {os.cpu_count()} CPUs)")
+    print(f"⏱️ Rerun latency p50 {r['p50_ms']:.0f} ms | p90 {r['p90_ms']:.0f} ms | p99 {r['p99_ms']:.0f} ms "
+          f"| mean {r['mean_ms']:.0f} ms")
+    print("   Rerun latency by step:")
+    for step, p50 in r["by_step_p50_ms"].items():
+        print(f"   {step:<28} p50 {p50:8.0f} ms")
+    if r["end_to_end_ms"]:
+        print("⏳ Background jobs, click to rendered result:")
+        for step, (p50, worst) in r["end_to_end_ms"].items():
+            print(f"   {step:<28} p50 {p50:8.0f} ms | max {worst:8.0f} ms")
+    print(f"🧠 RSS {r['rss_warm_mb']:.0f} MB per session process after warm-up -> {r['rss_per_session_mb']:.0f} MB "
+          f"after the flows ({r['rss_total_mb']:.0f} MB total)")
+    print(f"   Growth during the flows: {r['rss_growth_mb']:+.0f} MB mean, {r['rss_growth_max_mb']:+.0f} MB max")
+    if r["errors"]:
+        print(f"❌ {len(r['errors'])} session(s) failed, first: {r['errors'][0]}")
@@ -0,0 +1,137 @@
+import re
+import heapq
+import time
+import argparse
+import threading
+from bisect import bisect_left
+from data_store import DATASET_PATH, dataset_version, load_locations
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+# Ranking tiers, best first
+_LABEL_PREFIX, _CITY_PREFIX, _COUNTY_PREFIX, _TOKEN_MATCH = range(4)
+
+# Words the labels and selectors add ("Harris County", "Columbus City"); not part of the names
+_SUFFIX_WORDS = {"county", "city"}
+
+
+def _tokens(text):
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def _name_terms(text):
+    """Words of text without the County/City suffixes (kept if nothing else is left)."""
+    tokens = _tokens(text)
+    return [t for t in tokens if t not in _SUFFIX_WORDS] or tokens
+
+
+def location_label(state, county, city):
+    return f"{city}, {county} County, {state}"
+
+
+class LocationIndex:
+    """
+    Sorted-token index over every (State, County, City) location.
+
+    Each word of a location's name is stored once in a sorted token list
+    with the ids of the locations it appears in, so a prefix is a bisect
+    plus a contiguous slice. The full lower-cased labels are kept sorted
+    too (as normalized words), so "phoenix, mari" style queries rank
+    whole-label prefixes first. "County"/"City" are dropped from labels and
+    queries alike, so a label typed back ("Houston, Harris County") matches.
+    """
+
+    def __init__(self, locations):
+        self.locations = [tuple(map(str, loc)) for loc in locations]
+        labels = [" ".join(_name_terms(location_label(*loc))) for loc in self.locations]
+        self.labels = sorted(zip(labels, range(len(labels))))
+        self.label_keys = [label for label, _ in self.labels]
+
+        postings = {}
+        for i, (state, county, city) in enumerate(self.locations):
+            for token in set(_tokens(f"{city} {county} {state}")):
+                postings.setdefault(token, []).append(i)
+        self.tokens = sorted(postings)
+        self.postings = [postings[t] for t in self.tokens]
+        self.city_tokens = [set(_tokens(city)) for _, _, city in self.locations]
+        self.county_tokens = [set(_tokens(county)) for _, county, _ in self.locations]
+
+    def __len__(self):
+        return len(self.locations)
+
+    def _prefix_range(self, keys, prefix):
+        return bisect_left(keys, prefix), bisect_left(keys, prefix + "\uffff")
+
+    def _token_matches(self, term):
+        """Ids of locations with a word starting with term."""
+        lo, hi = self._prefix_range(self.tokens, term)
+        if hi - lo == 1:
+            return set(self.postings[lo])
+        return {i for ids in self.postings[lo:hi] for i in ids}
+
+    def search(self, query, limit=8):
+        """Top `limit` locations as (state, county, city); every query word must prefix a name word."""
+        terms = _name_terms(query)
+        if not terms:
+            return []
+
+        matches = None
+        for term in sorted(terms, key=len, reverse=True):   # longest term narrows fastest
+            ids = self._token_matches(term)
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                return []
+
+        lo, hi = self._prefix_range(self.label_keys, " ".join(terms))
+        label_hits = {i for _, i in self.labels[lo:hi]}
+
+        def rank(i):
+            if i in label_hits:
+                tier = _LABEL_PREFIX
+            elif any(t.startswith(terms[0]) for t in self.city_tokens[i]):
+                tier = _CITY_PREFIX
+            elif any(t.startswith(terms[0]) for t in self.county_tokens[i]):
+                tier = _COUNTY_PREFIX
+            else:
+                tier = _TOKEN_MATCH
+            return tier, self.locations[i][2], self.locations[i][0], self.locations[i][1]
+
+        return [self.locations[i] for i in heapq.nsmallest(limit, matches, key=rank)]
+
+
+def load_location_index(start_year=2020, filepath=DATASET_PATH):
+    """Process-wide index, rebuilt only when the dataset version changes."""
+    key = (dataset_version(filepath), start_year, filepath)
+    with _cache_lock:
+        if key not in _cache:
+            locations = load_locations(start_year, filepath)
+            _cache[key] = LocationIndex(locations.itertuples(index=False, name=None))
+        return _cache[key]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the location search index and time queries.")
+    parser.add_argument("--start-year", type=int, default=2020,
+                        help="index locations seen from this year (default: 2020, as the Input tab does)")
+    parser.add_argument("queries", nargs="*", help="queries to time (default: samples from the index)")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    index = load_location_index(args.start_year)
+    print(f"✅ Indexed {len(index):,} locations, {len(index.tokens):,} tokens "
+          f"in {1000 * (time.perf_counter() - t0):.1f} ms (dataset load included)")
+
+    queries = args.queries
+    if not queries:
+        state, county, city = index.locations[len(index) // 2]
+        queries = [city[:1], city[:3], city, f"{city}, {county[:2]}", county, state[:4], f"{state} {city[:2]}", "zzz"]
+
+    for query in queries:
+        n = 2000
+        t0 = time.perf_counter()
+        for _ in range(n):
+            results = index.search(query)
+        per_query_us = 1e6 * (time.perf_counter() - t0) / n
+        top = location_label(*results[0]) if results else "no match"
+        print(f"⏱️ {query!r:<28} {per_query_us:8.1f} µs | {len(results)} shown | top: {top}")
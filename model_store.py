@@ -0,0 +1,720 @@
+import os
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import numpy as np
+import joblib
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import OneHotEncoder
+from data_store import AQI_COLUMNS, POLLUTANT_TARGETS
+
+MODEL_DIR = "models/reg_pipeline"
+
+# Forest size of the full model store (CLI defaults)
+MODEL_PARAMS = {"n_estimators": 100, "max_depth": None, "min_samples_leaf": 1}
+
+# Optional fast path: a smaller forest predicting only the four pollutant AQIs (enough for the category)
+AQI_MODEL_DIR = "models/aqi_pipeline"
+AQI_MODEL_PARAMS = {"n_estimators": 50, "max_depth": 20, "min_samples_leaf": 5}
+
+# Upper AQI bound of each EPA category but the last; the Prediction tab's
+# categorize_aqi() and _aqi_categories() below both bin with these
+CATEGORY_BREAKS = [50, 100, 150, 200]
+
+# Flat node arrays stored one .npy per array so np.load(mmap_mode="r") can map them
+_ARRAYS = ["roots", "feature", "threshold", "left", "right", "leaf_index", "leaf_values"]
+
+# Pointer file naming the published version directory inside a store
+CURRENT_FILE = "CURRENT"
+
+# Prediction interval: these quantiles of the per-tree predictions (a 90% band)
+INTERVAL_QUANTILES = (0.05, 0.95)
+
+# Extra interval column: the band of the Overall AQI (max of the pollutant AQIs)
+OVERALL_AQI = "Overall AQI"
+
+# Batches from this size up use sklearn's compiled tree walk (see --bench-batches)
+COMPILED_MIN_ROWS = 200
+
+
+def interval_targets(targets):
+    """Columns of an interval: the targets, plus OVERALL_AQI when every pollutant AQI is predicted."""
+    targets = list(targets)
+    return targets + [OVERALL_AQI] if set(AQI_COLUMNS) <= set(targets) else targets
+
+
+class RowEncoder:
+    """
+    Encodes a single (date, State, County, City) row straight into a feature vector.
+
+    Column positions are read from the fitted ColumnTransformer once, so a
+    prediction skips DataFrame construction, column validation and the
+    OneHotEncoder. Unknown categories encode as all zeros, matching
+    handle_unknown="ignore".
+    """
+
+    def __init__(self, preprocessor):
+        self.n_features = len(preprocessor.get_feature_names_out())
+        self.passthrough = []   # (column, output index)
+        self.onehot = []        # (column, {category: output index})
+        # Fitted "passthrough" entries become FunctionTransformers; use the spec
+        passthrough = {name for name, transformer, _ in preprocessor.transformers if transformer == "passthrough"}
+        if preprocessor.remainder == "passthrough":
+            passthrough.add("remainder")
+
+        for name, transformer, columns in preprocessor.transformers_:
+            if (isinstance(transformer, str) and transformer == "drop") or len(columns) == 0:
+                continue
+            start = preprocessor.output_indices_[name].start
+            if name in passthrough:
+                self.passthrough += [(col, start + j) for j, col in enumerate(columns)]
+            elif isinstance(transformer, OneHotEncoder) and transformer.drop is None \
+                    and getattr(transformer, "infrequent_categories_", None) is None:
+                for col, categories in zip(columns, transformer.categories_):
+                    self.onehot.append((col, {c: start + j for j, c in enumerate(categories)}))
+                    start += len(categories)
+            else:
+                raise ValueError(f"Cannot compile transformer {name!r} for single-row encoding")
+
+    def encode(self, values):
+        """values: {column: value} for every input column -> (1, n_features) float32 row."""
+        row = np.zeros((1, self.n_features), dtype=np.float32)
+        for col, index in self.passthrough:
+            row[0, index] = values[col]
+        for col, positions in self.onehot:
+            index = positions.get(values[col])
+            if index is not None:
+                row[0, index] = 1.0
+        return row
+
+
+class FlatForestModel:
+    """
+    Read-only Random Forest served from flat node arrays.
+
+    All trees are concatenated into one set of node arrays and a small batch
+    walks every tree at once: each step advances all (row, tree) pairs that
+    are not on a leaf yet with a handful of vectorized gathers. Only leaves
+    keep their multi-output values. When loaded with mmap_mode="r" the
+    arrays live in the OS page cache, so every process on the host that
+    serves the same model shares one physical copy.
+
+    The vectorized walk loses to compiled code as batches grow, so batches
+    of COMPILED_MIN_ROWS or more go through sklearn Tree objects rebuilt from
+    the same arrays on first use (private memory, about 70 bytes per node).
+    Both paths reach the same leaves.
+    """
+
+    def __init__(self, preprocessor, arrays, meta):
+        self.preprocessor = preprocessor
+        self.meta = meta
+        self.targets = meta["targets"]
+        for name in _ARRAYS:
+            # Plain ndarray views of the mapping; np.memmap adds overhead to every fancy index
+            setattr(self, name, np.asarray(arrays[name]))
+        try:
+            self.encoder = RowEncoder(preprocessor)
+        except ValueError:
+            self.encoder = None   # predict_one() falls back to the DataFrame path
+        self._compiled = None
+        self._compiled_lock = threading.Lock()
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def interval_targets(self):
+        return interval_targets(self.targets)
+
+    def transform(self, X):
+        """Encode a feature DataFrame into the dense float32 matrix the trees split on."""
+        Xt = self.preprocessor.transform(X)
+        if hasattr(Xt, "toarray"):
+            Xt = Xt.toarray()
+        # Trees compare float32 features against float64 thresholds, like sklearn
+        return np.asarray(Xt, dtype=np.float32)
+
+    def leaf_nodes(self, Xt):
+        """Leaf node reached in every tree: (rows, trees) node ids."""
+        if len(Xt) >= COMPILED_MIN_ROWS:
+            return self.compiled_leaf_nodes(Xt)
+        return self.walk_leaf_nodes(Xt)
+
+    def walk_leaf_nodes(self, Xt):
+        """leaf_nodes() with all trees stepped at once in numpy."""
+        n_rows = len(Xt)
+        node = np.tile(self.roots, n_rows)
+        row = np.repeat(np.arange(n_rows), self.n_trees)
+        # (row, tree) pairs not yet on a leaf; finished pairs drop out of the work set
+        active = np.flatnonzero(self.leaf_index[node] < 0)
+        while len(active):
+            current = node[active]
+            go_left = Xt[row[active], self.feature[current]] <= self.threshold[current]
+            current = np.where(go_left, self.left[current], self.right[current])
+            node[active] = current
+            active = active[self.leaf_index[current] < 0]
+        return node.reshape(n_rows, self.n_trees)
+
+    def compiled_trees(self):
+        """sklearn Tree per forest tree, split structure only, built once per process."""
+        from sklearn.tree._tree import Tree, NODE_DTYPE
+
+        with self._compiled_lock:
+            if self._compiled is None:
+                n_features = len(self.preprocessor.get_feature_names_out())
+                ends = np.append(self.roots[1:], len(self.left))
+                trees = []
+                for start, end in zip(self.roots.astype(np.int64), ends.astype(np.int64)):
+                    is_leaf = self.leaf_index[start:end] >= 0
+                    nodes = np.zeros(end - start, dtype=NODE_DTYPE)
+                    # sklearn marks leaves with child -1 and feature/threshold -2
+                    nodes["left_child"] = np.where(is_leaf, -1, self.left[start:end] - start)
+                    nodes["right_child"] = np.where(is_leaf, -1, self.right[start:end] - start)
+                    nodes["feature"] = np.where(is_leaf, -2, self.feature[start:end])
+                    nodes["threshold"] = np.where(is_leaf, -2, self.threshold[start:end])
+                    # apply() never reads values, so a single zero output keeps them small
+                    tree = Tree(n_features, np.ones(1, dtype=np.intp), 1)
+                    tree.__setstate__({"max_depth": 0, "node_count": end - start, "nodes": nodes,
+                                       "values": np.zeros((end - start, 1, 1))})
+                    trees.append(tree)
+                self._compiled = trees
+            return self._compiled
+
+    def compiled_leaf_nodes(self, Xt):
+        """leaf_nodes() through sklearn's compiled tree walk, one tree at a time."""
+        Xt = np.ascontiguousarray(Xt, dtype=np.float32)
+        leaves = np.empty((len(Xt), self.n_trees), dtype=np.int64)
+        for t, tree in enumerate(self.compiled_trees()):
+            leaves[:, t] = tree.apply(Xt)
+        return leaves + self.roots
+
+    def predict_encoded(self, Xt):
+        # (trees, rows) so each tree's leaves are contiguous for the gathers below
+        leaves = self.leaf_index[self.leaf_nodes(Xt).T]
+        out = np.zeros((len(Xt), self.leaf_values.shape[1]))
+        values = np.empty_like(out)
+        # Summed tree by tree, in order, so results match sklearn bit for bit
+        for t in range(self.n_trees):
+            np.take(self.leaf_values, leaves[t], axis=0, out=values)
+            out += values
+        return out / self.n_trees
+
+    def predict_interval_encoded(self, Xt, quantiles=INTERVAL_QUANTILES):
+        """
+        (point, lower, upper) from one traversal: the forest mean (rows, targets)
+        plus quantiles of the per-tree predictions (rows, interval_targets).
+
+        The band is the spread between trees (model uncertainty), so it is
+        narrower than the scatter of individual observations. The Overall AQI
+        band takes the quantiles of each tree's max over the pollutant AQIs,
+        and every band is widened where needed to contain its point estimate.
+        """
+        per_tree = self.leaf_values[self.leaf_index[self.leaf_nodes(Xt)]]   # (rows, trees, targets)
+        point = np.zeros((len(Xt), per_tree.shape[2]))
+        for t in range(self.n_trees):
+            point += per_tree[:, t]
+        point /= self.n_trees
+
+        centre = point
+        if len(self.interval_targets) > len(self.targets):
+            aqi = [self.targets.index(c) for c in AQI_COLUMNS]
+            per_tree = np.concatenate([per_tree, per_tree[:, :, aqi].max(axis=2, keepdims=True)], axis=2)
+            centre = np.hstack([point, point[:, aqi].max(axis=1, keepdims=True)])
+        lower, upper = np.quantile(per_tree, quantiles, axis=1)
+        return point, np.minimum(lower, centre), np.maximum(upper, centre)
+
+    def predict(self, X, chunk_size=4096):
+        """Same output as the source pipeline's predict() for a feature DataFrame."""
+        parts = [
+            self.predict_encoded(self.transform(X.iloc[i:i + chunk_size]))
+            for i in range(0, len(X), chunk_size)
+        ]
+        return np.vstack(parts) if parts else np.empty((0, len(self.targets)))
+
+    def predict_interval(self, X, quantiles=INTERVAL_QUANTILES, chunk_size=4096):
+        """predict() plus lower/upper quantile arrays with one column per interval_targets entry."""
+        parts = [
+            self.predict_interval_encoded(self.transform(X.iloc[i:i + chunk_size]), quantiles)
+            for i in range(0, len(X), chunk_size)
+        ]
+        if not parts:
+            bounds = np.empty((0, len(self.interval_targets)))
+            return np.empty((0, len(self.targets))), bounds, bounds.copy()
+        return tuple(np.vstack(arrays) for arrays in zip(*parts))
+
+    def _encode_one(self, state, county, city, date):
+        values = {"Year": date.year, "Month": date.month, "Day": date.day,
+                  "State": state, "County": county, "City": city}
+        if self.encoder is None:
+            import pandas as pd
+            return self.transform(pd.DataFrame([values]))
+        return self.encoder.encode(values)
+
+    def predict_one(self, state, county, city, date):
+        """Predictions for one location/date as a 1-D array, without building a DataFrame."""
+        return self.predict_encoded(self._encode_one(state, county, city, date))[0]
+
+    def predict_one_interval(self, state, county, city, date, quantiles=INTERVAL_QUANTILES):
+        """predict_one() plus its lower and upper bounds (over interval_targets), as three 1-D arrays."""
+        point, lower, upper = self.predict_interval_encoded(self._encode_one(state, county, city, date), quantiles)
+        return point[0], lower[0], upper[0]
+
+
+def export_forest(forest):
+    """Flatten a fitted RandomForestRegressor into concatenated node arrays."""
+    trees = [est.tree_ for est in forest.estimators_]
+    offsets = np.cumsum([0] + [t.node_count for t in trees])
+    n_nodes = int(offsets[-1])
+    n_features = forest.n_features_in_
+
+    feature_dtype = np.int16 if n_features < np.iinfo(np.int16).max else np.int32
+    feature = np.zeros(n_nodes, dtype=feature_dtype)
+    threshold = np.zeros(n_nodes, dtype=np.float64)
+    left = np.zeros(n_nodes, dtype=np.int32)
+    right = np.zeros(n_nodes, dtype=np.int32)
+    leaf_index = np.full(n_nodes, -1, dtype=np.int32)
+    leaf_values = []
+    n_leaves = 0
+
+    for tree, offset in zip(trees, offsets):
+        nodes = slice(offset, offset + tree.node_count)
+        ids = np.arange(offset, offset + tree.node_count, dtype=np.int32)
+        is_leaf = tree.children_left == -1
+
+        feature[nodes] = np.where(is_leaf, 0, tree.feature)
+        threshold[nodes] = tree.threshold
+        left[nodes] = np.where(is_leaf, ids, tree.children_left + offset)
+        right[nodes] = np.where(is_leaf, ids, tree.children_right + offset)
+
+        leaf_ids = ids[is_leaf]
+        leaf_index[leaf_ids] = np.arange(n_leaves, n_leaves + len(leaf_ids))
+        leaf_values.append(tree.value[is_leaf][:, :, 0])
+        n_leaves += len(leaf_ids)
+
+    return {
+        "roots": offsets[:-1].astype(np.int32),
+        "feature": feature,
+        "threshold": threshold,
+        "left": left,
+        "right": right,
+        "leaf_index": leaf_index,
+        "leaf_values": np.vstack(leaf_values),
+    }
+
+
+def _current_version(model_dir):
+    """Directory of the published version: model_dir/<CURRENT>, or model_dir itself for a pre-pointer store."""
+    try:
+        with open(os.path.join(model_dir, CURRENT_FILE)) as f:
+            return os.path.join(model_dir, f.read().strip())
+    except OSError:
+        return model_dir
+
+
+def save_model(pipeline, model_dir=MODEL_DIR, targets=POLLUTANT_TARGETS, extra_meta=None):
+    """
+    Persist a fitted preprocessor + Random Forest pipeline as a flat model store.
+
+    Each save writes a new version directory inside model_dir, then swaps
+    the CURRENT pointer file atomically, so readers always find a complete
+    store. The previous version is kept for readers still loading it;
+    older ones are removed.
+    """
+    forest = pipeline.named_steps["regressor"]
+    arrays = export_forest(forest)
+    meta = {
+        "targets": list(targets),
+        "n_trees": len(forest.estimators_),
+        "n_nodes": int(len(arrays["feature"])),
+        "params": {k: forest.get_params()[k] for k in ("n_estimators", "max_depth", "min_samples_leaf")},
+    }
+    meta.update(extra_meta or {})
+
+    os.makedirs(model_dir, exist_ok=True)
+    version_dir = tempfile.mkdtemp(dir=model_dir, prefix=time.strftime("v-%Y%m%d-%H%M%S-"))
+    try:
+        joblib.dump(pipeline.named_steps["preprocessor"], os.path.join(version_dir, "preprocessor.joblib"))
+        for name, array in arrays.items():
+            np.save(os.path.join(version_dir, f"{name}.npy"), array)
+        with open(os.path.join(version_dir, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+    except OSError:
+        shutil.rmtree(version_dir, ignore_errors=True)
+        raise
+
+    previous = os.path.basename(_current_version(model_dir))
+    fd, tmp_pointer = tempfile.mkstemp(dir=model_dir, prefix=".tmp-")
+    with os.fdopen(fd, "w") as f:
+        f.write(os.path.basename(version_dir))
+    os.replace(tmp_pointer, os.path.join(model_dir, CURRENT_FILE))
+
+    keep = {os.path.basename(version_dir), previous}
+    for name in os.listdir(model_dir):
+        if name.startswith("v-") and name not in keep:
+            shutil.rmtree(os.path.join(model_dir, name), ignore_errors=True)
+    return model_dir
+
+
+def model_exists(model_dir=MODEL_DIR):
+    return os.path.exists(os.path.join(_current_version(model_dir), "meta.json"))
+
+
+def load_model(model_dir=MODEL_DIR, mmap=True):
+    """Load the current version of a flat model store; node arrays are memory-mapped read-only by default."""
+    version_dir = _current_version(model_dir)
+    with open(os.path.join(version_dir, "meta.json")) as f:
+        meta = json.load(f)
+    preprocessor = joblib.load(os.path.join(version_dir, "preprocessor.joblib"))
+    arrays = {
+        name: np.load(os.path.join(version_dir, f"{name}.npy"), mmap_mode="r" if mmap else None)
+        for name in _ARRAYS
+    }
+    return FlatForestModel(preprocessor, arrays, meta)
+
+
+def store_size_mb(model_dir=MODEL_DIR):
+    """Size of the current version only."""
+    version_dir = _current_version(model_dir)
+    total = sum(
+        os.path.getsize(os.path.join(version_dir, name))
+        for name in os.listdir(version_dir)
+        if os.path.isfile(os.path.join(version_dir, name))
+    )
+    return total / 1024 ** 2
+
+
+# Size budgets compared by --budget-report, from least to most aggressive
+SIZE_BUDGETS = [
+    {"n_estimators": 100, "max_depth": None, "min_samples_leaf": 1},
+    {"n_estimators": 50, "max_depth": None, "min_samples_leaf": 1},
+    {"n_estimators": 100, "max_depth": 20, "min_samples_leaf": 1},
+    {"n_estimators": 100, "max_depth": None, "min_samples_leaf": 5},
+    {"n_estimators": 50, "max_depth": 20, "min_samples_leaf": 5},
+    {"n_estimators": 25, "max_depth": 15, "min_samples_leaf": 10},
+]
+
+
+def budget_report(budgets=SIZE_BUDGETS):
+    """Train each size budget on the same split and report store size vs accuracy cost."""
+    from train_model import load_training_data, build_pipeline, evaluate_model
+
+    X_reg, y_reg = load_training_data()
+    X_train, X_test, y_train, y_test = train_test_split(
+        X_reg, y_reg, test_size=0.2, random_state=42
+    )
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, params in enumerate(budgets):
+            pipeline = build_pipeline(**params)
+            pipeline.fit(X_train, y_train)
+            model_dir = save_model(pipeline, os.path.join(tmp, f"budget_{i}"))
+            metrics = evaluate_model(load_model(model_dir), X_test, y_test)
+            rows.append({
+                **params,
+                "size_mb": store_size_mb(model_dir),
+                "mae": metrics["mae"],
+                "r2": metrics["r2"],
+            })
+            print(f"✅ {params} -> {rows[-1]['size_mb']:.1f} MB, MAE {metrics['mae']:.3f}")
+
+    base = rows[0]
+    for row in rows:
+        row["mae_cost"] = row["mae"] - base["mae"]
+        row["size_saving_pct"] = 100 * (1 - row["size_mb"] / base["size_mb"])
+    return rows
+
+
+def _old_path_row(state, county, city, date):
+    """The DataFrame the Input tab used to build for a single prediction."""
+    import pandas as pd
+    row = pd.DataFrame({"Date": [pd.to_datetime(date)], "State": [state], "County": [county], "City": [city]})
+    row["Year"] = row["Date"].dt.year
+    row["Month"] = row["Date"].dt.month
+    row["Day"] = row["Date"].dt.day
+    return row.drop(columns=["Date"])
+
+
+def _reference_model(n_estimators, n_jobs=-1):
+    """Fit a pipeline on the training data and load its flat export: (X, pipeline, flat model)."""
+    from train_model import load_training_data, build_pipeline
+
+    X_reg, y_reg = load_training_data()
+    pipeline = build_pipeline(n_estimators=n_estimators, n_jobs=n_jobs)
+    pipeline.fit(X_reg, y_reg)
+    with tempfile.TemporaryDirectory() as tmp:
+        model = load_model(save_model(pipeline, os.path.join(tmp, "model")), mmap=False)
+    return X_reg, pipeline, model
+
+
+def batch_benchmark(batch_sizes=(1, 10, 100, 300, 1000, 3000, 10000), n_estimators=100, budget_s=2.0):
+    """
+    Stock pipeline.predict() vs the flat engine per batch size.
+
+    Both sides get the same feature DataFrame, so stock_ms and flat_ms
+    include encoding; walk_ms and compiled_ms are the two leaf-finding paths
+    alone on pre-encoded rows, which is what COMPILED_MIN_ROWS is chosen
+    from. The flat engine must match the pipeline exactly.
+    """
+    X_reg, pipeline, model = _reference_model(n_estimators)
+    t0 = time.perf_counter()
+    model.compiled_trees()
+    print(f"✅ Compiled trees built once in {time.perf_counter() - t0:.2f}s")
+
+    def timed(fn, X):
+        # Repeat small batches until the time budget is used, at least once
+        calls, t0 = 0, time.perf_counter()
+        while calls == 0 or (time.perf_counter() - t0 < budget_s / 2 and calls < 200):
+            fn(X)
+            calls += 1
+        return 1000 * (time.perf_counter() - t0) / calls
+
+    rows = []
+    for size in batch_sizes:
+        X = X_reg.sample(n=min(size, len(X_reg)), random_state=size)
+        Xt = model.transform(X)
+        diff = float(np.abs(model.predict(X) - pipeline.predict(X)).max())
+        if not np.array_equal(model.walk_leaf_nodes(Xt), model.compiled_leaf_nodes(Xt)):
+            raise AssertionError(f"batch {len(X)}: walk and compiled paths reached different leaves")
+        stock_ms = timed(pipeline.predict, X)
+        flat_ms = timed(model.predict, X)
+        walk_ms = timed(model.walk_leaf_nodes, Xt)
+        compiled_ms = timed(model.compiled_leaf_nodes, Xt)
+        rows.append({
+            "batch": len(X),
+            "path": "compiled" if len(X) >= COMPILED_MIN_ROWS else "walk",
+            "stock_ms": stock_ms,
+            "flat_ms": flat_ms,
+            "walk_ms": walk_ms,
+            "compiled_ms": compiled_ms,
+            "speedup": stock_ms / flat_ms,
+            "max_diff": diff,
+        })
+        print(f"✅ batch {len(X):>6}: stock {stock_ms:9.2f} ms | flat {flat_ms:9.2f} ms | "
+              f"walk {walk_ms:9.2f} ms | compiled {compiled_ms:9.2f} ms | diff {diff:g}")
+    return rows
+
+
+def interval_benchmark(batch_sizes=(1, 10, 100, 1000, 10000), n_estimators=100, budget_s=2.0):
+    """
+    Added latency of predict_interval_encoded() over predict_encoded() per batch size.
+
+    Both run on the same pre-encoded rows; the interval's point estimate
+    must equal the plain prediction exactly.
+    """
+    X_reg, pipeline, model = _reference_model(n_estimators)
+
+    def timed(fn, Xt):
+        calls, t0 = 0, time.perf_counter()
+        while calls == 0 or (time.perf_counter() - t0 < budget_s / 2 and calls < 200):
+            fn(Xt)
+            calls += 1
+        return 1000 * (time.perf_counter() - t0) / calls
+
+    rows = []
+    for size in batch_sizes:
+        Xt = model.transform(X_reg.sample(n=min(size, len(X_reg)), random_state=size))
+        point, lower, upper = model.predict_interval_encoded(Xt)
+        diff = float(np.abs(point - model.predict_encoded(Xt)).max())
+        predict_ms = timed(model.predict_encoded, Xt)
+        interval_ms = timed(model.predict_interval_encoded, Xt)
+        rows.append({
+            "batch": len(Xt),
+            "predict_ms": predict_ms,
+            "interval_ms": interval_ms,
+            "overhead_pct": 100 * (interval_ms / predict_ms - 1),
+            "mean_width": float((upper - lower).mean()),
+            "max_point_diff": diff,
+        })
+        print(f"✅ batch {len(Xt):>6}: predict {predict_ms:9.2f} ms | with interval {interval_ms:9.2f} ms | "
+              f"diff {diff:g}")
+    return rows
+
+
+def _aqi_categories(aqi_values):
+    """EPA category index per row from its pollutant AQI columns (Overall AQI = their max)."""
+    return np.searchsorted(CATEGORY_BREAKS, np.max(aqi_values, axis=1), side="left")
+
+
+def aqi_fast_path_report(n_latency_rows=200, **params):
+    """
+    Full 12-target forest vs the AQI-only fast-path forest on the same split.
+
+    Reports store size, predict_one() latency, Overall AQI MAE and how often
+    the two agree on the category (and match the observed one).
+    """
+    from train_model import load_training_data, build_pipeline
+    import pandas as pd
+
+    X_reg, y_reg = load_training_data()
+    X_train, X_test, y_train, y_test = train_test_split(
+        X_reg, y_reg, test_size=0.2, random_state=42
+    )
+    observed = _aqi_categories(y_test[AQI_COLUMNS].to_numpy())
+    sample = X_test.sample(n=min(n_latency_rows, len(X_test)), random_state=0)
+    cases = [
+        (str(r.State), str(r.County), str(r.City),
+         pd.Timestamp(year=int(r.Year), month=int(r.Month), day=int(r.Day)).date())
+        for r in sample.itertuples(index=False)
+    ]
+
+    variants = {
+        "full (12 targets)": ({}, POLLUTANT_TARGETS),
+        "fast path (AQI only)": ({**AQI_MODEL_PARAMS, **params}, AQI_COLUMNS),
+    }
+    rows, categories = [], {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (variant_params, targets) in variants.items():
+            pipeline = build_pipeline(**variant_params)
+            pipeline.fit(X_train, y_train[targets])
+            model_dir = save_model(pipeline, os.path.join(tmp, f"model_{len(rows)}"), targets=targets)
+            model = load_model(model_dir)
+
+            preds = model.predict(X_test)
+            aqi = preds[:, [targets.index(c) for c in AQI_COLUMNS]]
+            categories[name] = _aqi_categories(aqi)
+            t0 = time.perf_counter()
+            for case in cases:
+                model.predict_one(*case)
+            rows.append({
+                "model": name,
+                "targets": len(targets),
+                "trees": model.n_trees,
+                "size_mb": store_size_mb(model_dir),
+                "predict_one_us": 1e6 * (time.perf_counter() - t0) / len(cases),
+                "overall_aqi_mae": float(np.abs(aqi.max(axis=1) - y_test[AQI_COLUMNS].max(axis=1)).mean()),
+                "category_accuracy": float((categories[name] == observed).mean()),
+            })
+
+    full, fast = categories.values()
+    return pd.DataFrame(rows), float((full == fast).mean())
+
+
+def encoding_check(n_rows=200, n_estimators=10):
+    """
+    Equivalence check and latency microbenchmark for the single-row encoder.
+
+    Fits a small pipeline, publishes it as a flat store, then compares the
+    encoder against preprocessor.transform and predict_one() against
+    pipeline.predict() on sampled rows plus unseen locations.
+    """
+    import pandas as pd
+
+    X_reg, pipeline, model = _reference_model(n_estimators, n_jobs=1)
+
+    sample = X_reg.sample(n=min(n_rows, len(X_reg)), random_state=0).astype({"State": str, "County": str, "City": str})
+    cases = [
+        (r.State, r.County, r.City, pd.Timestamp(year=int(r.Year), month=int(r.Month), day=int(r.Day)).date())
+        for r in sample.itertuples(index=False)
+    ]
+    first = cases[0]
+    cases += [(first[0], first[1], "Nowhere", first[3]), ("Atlantis", "Unknown", "Nowhere", first[3])]
+
+    preprocessor = pipeline.named_steps["preprocessor"]
+    encoding_diff = prediction_diff = 0.0
+    for state, county, city, date in cases:
+        df_row = _old_path_row(state, county, city, date)
+        expected = preprocessor.transform(df_row)
+        expected = expected.toarray() if hasattr(expected, "toarray") else expected
+        encoded = model.encoder.encode({"Year": date.year, "Month": date.month, "Day": date.day,
+                                        "State": state, "County": county, "City": city})
+        encoding_diff = max(encoding_diff, float(np.abs(encoded - expected).max()))
+        pred = model.predict_one(state, county, city, date)
+        prediction_diff = max(prediction_diff, float(np.abs(pred - pipeline.predict(df_row)[0]).max()))
+
+    def per_call_us(fn):
+        t0 = time.perf_counter()
+        for case in cases:
+            fn(*case)
+        return 1e6 * (time.perf_counter() - t0) / len(cases)
+
+    return {
+        "rows": len(cases),
+        "max_encoding_diff": encoding_diff,
+        "max_prediction_diff": prediction_diff,
+        "encode_pipeline_us": per_call_us(lambda *c: preprocessor.transform(_old_path_row(*c))),
+        "encode_direct_us": per_call_us(lambda s, co, ci, d: model.encoder.encode(
+            {"Year": d.year, "Month": d.month, "Day": d.day, "State": s, "County": co, "City": ci})),
+        "predict_pipeline_us": per_call_us(lambda *c: pipeline.predict(_old_path_row(*c))),
+        "predict_flat_dataframe_us": per_call_us(lambda *c: model.predict(_old_path_row(*c))),
+        "predict_one_us": per_call_us(model.predict_one),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the memory-mappable model store.")
+    # None = take the value for the chosen store below (full model or AQI-only fast path)
+    parser.add_argument("--n-estimators", type=int, default=None,
+                        help=f"default {MODEL_PARAMS['n_estimators']}, or {AQI_MODEL_PARAMS['n_estimators']} "
+                             "with --aqi-only / --compare-aqi")
+    parser.add_argument("--max-depth", type=int, default=None,
+                        help=f"default unlimited, or {AQI_MODEL_PARAMS['max_depth']} with --aqi-only / --compare-aqi")
+    parser.add_argument("--min-samples-leaf", type=int, default=None,
+                        help=f"default {MODEL_PARAMS['min_samples_leaf']}, or {AQI_MODEL_PARAMS['min_samples_leaf']} "
+                             "with --aqi-only / --compare-aqi")
+    parser.add_argument("--model-dir", default=None, help=f"default {MODEL_DIR}, or {AQI_MODEL_DIR} with --aqi-only")
+    parser.add_argument("--aqi-only", action="store_true",
+                        help=f"build the AQI-only fast-path store ({AQI_MODEL_DIR}, smaller forest by default)")
+    parser.add_argument("--full-history", action="store_true",
+                        help="train on a bounded-memory sample of every year instead of 2020 onward")
+    parser.add_argument("--budget-report", action="store_true",
+                        help="compare size budgets instead of building the store")
+    parser.add_argument("--check-encoding", action="store_true",
+                        help="verify and benchmark the single-row encoder against the pipeline")
+    parser.add_argument("--bench-batches", action="store_true",
+                        help="compare stock and flat predict latency across batch sizes")
+    parser.add_argument("--compare-aqi", action="store_true",
+                        help="compare the AQI-only fast path with the full model (size, latency, category agreement)")
+    parser.add_argument("--bench-intervals", action="store_true",
+                        help="measure the latency added by prediction intervals across batch sizes")
+    args = parser.parse_args()
+    if args.aqi_only or args.compare_aqi:
+        defaults = {"model_dir": AQI_MODEL_DIR, **AQI_MODEL_PARAMS}
+    else:
+        defaults = {"model_dir": MODEL_DIR, **MODEL_PARAMS}
+    for name, value in defaults.items():
+        if getattr(args, name) is None:   # explicit flags win
+            setattr(args, name, value)
+
+    if args.bench_batches:
+        import pandas as pd
+        report = pd.DataFrame(batch_benchmark(n_estimators=args.n_estimators))
+        print(f"\n📊 Flat engine vs stock predict ({args.n_estimators} trees):")
+        print(report.to_string(index=False, float_format="{:.3f}".format))
+    elif args.compare_aqi:
+        report, agreement = aqi_fast_path_report(n_estimators=args.n_estimators, max_depth=args.max_depth,
+                                                 min_samples_leaf=args.min_samples_leaf)
+        print("\n📊 AQI-only fast path vs full model (held-out rows):")
+        print(report.to_string(index=False, float_format="{:.3f}".format))
+        print(f"🎯 Category agreement between the two models: {agreement:.1%}")
+    elif args.bench_intervals:
+        import pandas as pd
+        report = pd.DataFrame(interval_benchmark(n_estimators=args.n_estimators))
+        low, high = INTERVAL_QUANTILES
+        print(f"\n📊 Prediction interval ({low:.0%}–{high:.0%} of trees) vs plain predict ({args.n_estimators} trees):")
+        print(report.to_string(index=False, float_format="{:.3f}".format))
+    elif args.check_encoding:
+        r = encoding_check()
+        status = "✅" if r["max_encoding_diff"] == 0 and r["max_prediction_diff"] == 0 else "❌"
+        print(f"{status} {r['rows']} rows | max encoding diff {r['max_encoding_diff']:g} | "
+              f"max prediction diff {r['max_prediction_diff']:g}")
+        print(f"⏱️ Encode:  pipeline {r['encode_pipeline_us']:.0f} µs -> direct {r['encode_direct_us']:.1f} µs")
+        print(f"⏱️ Predict: sklearn pipeline {r['predict_pipeline_us']:.0f} µs | "
+              f"flat + DataFrame {r['predict_flat_dataframe_us']:.0f} µs | "
+              f"predict_one {r['predict_one_us']:.0f} µs")
+    elif args.budget_report:
+        import pandas as pd
+        report = pd.DataFrame(budget_report())
+        print("\n📊 Size budget report (cost relative to the unrestricted forest):")
+        print(report.to_string(index=False, float_format="{:.3f}".format))
+    else:
+        from train_model import train_regression_model
+        targets = AQI_COLUMNS if args.aqi_only else POLLUTANT_TARGETS
+        pipeline = train_regression_model(args.n_estimators, args.max_depth, args.min_samples_leaf,
+                                          full_history=args.full_history, targets=targets)
+        save_model(pipeline, args.model_dir, targets=targets)
+        print(f"💾 Model store written to {args.model_dir} ({store_size_mb(args.model_dir):.1f} MB)")
@@ -0,0 +1,184 @@
+import os
+import json
+import time
+import shutil
+import argparse
+import threading
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from data_store import (
+    DATASET_PATH, EARLIEST_YEAR, LOCATION_COLUMNS, POLLUTANT_TARGETS,
+    dataset_version, ensure_dataset, read_clean_csv,
+)
+
+PARTITION_DIR = "data/partitioned"
+SOURCE_FILE = "_source.json"
+
+# Hive layout: data/partitioned/State=Ohio/Year=2021/part-0.parquet
+PARTITIONING = ds.partitioning(pa.schema([("State", pa.string()), ("Year", pa.int16())]), flavor="hive")
+
+# out_dir -> (manifest stamp, pyarrow dataset)
+_dataset = {}
+_dataset_lock = threading.Lock()
+
+
+def build_partitions(filepath=DATASET_PATH, out_dir=PARTITION_DIR):
+    """
+    Rewrite the cleaned source CSV as parquet files partitioned by State and Year.
+
+    Rows are cleaned exactly like the compact dataset (duplicates dropped,
+    medians over every year filled in) and keep their CSV order in a _row
+    column. The new tree is built next to the old one and swapped in whole.
+    """
+    df = read_clean_csv(ensure_dataset(filepath))
+    df.insert(0, "_row", pd.RangeIndex(len(df), dtype="int32"))
+    df["Year"] = df["Date"].dt.year.astype("int16")
+    df["State"] = df["State"].astype(str)
+
+    tmp_dir = out_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    ds.write_dataset(
+        pa.Table.from_pandas(df, preserve_index=False),
+        tmp_dir,
+        format="parquet",
+        partitioning=PARTITIONING,
+        existing_data_behavior="overwrite_or_ignore",
+    )
+    with open(os.path.join(tmp_dir, SOURCE_FILE), "w") as f:
+        json.dump({"source": filepath, "version": dataset_version(filepath), "rows": len(df)}, f)
+
+    old_dir = out_dir + ".old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(out_dir):
+        os.replace(out_dir, old_dir)
+    os.replace(tmp_dir, out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+    with _dataset_lock:
+        _dataset.pop(out_dir, None)
+    return len(df)
+
+
+def partitions_current(filepath=DATASET_PATH, out_dir=PARTITION_DIR):
+    """True if out_dir was built from the current version of the source CSV."""
+    try:
+        with open(os.path.join(out_dir, SOURCE_FILE)) as f:
+            return json.load(f)["version"] == dataset_version(filepath)
+    except (OSError, ValueError, KeyError):
+        return False
+
+
+def _manifest_stamp(out_dir):
+    """Identity of out_dir's _source.json; a rebuild in any process swaps in a new one."""
+    try:
+        stat = os.stat(os.path.join(out_dir, SOURCE_FILE))
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def _open(out_dir):
+    """Cached dataset for out_dir, re-opened when the tree has been rebuilt since."""
+    stamp = _manifest_stamp(out_dir)
+    with _dataset_lock:
+        cached = _dataset.get(out_dir)
+        if cached is None or cached[0] != stamp:
+            cached = _dataset[out_dir] = (stamp, ds.dataset(out_dir, format="parquet", partitioning=PARTITIONING,
+                                                            exclude_invalid_files=True))
+        return cached[1]
+
+
+def _partition_filter(states=None, start_year=None, end_year=None):
+    expr = None
+    for term in (
+        ds.field("State").isin(list(states)) if states is not None else None,
+        ds.field("Year") >= start_year if start_year is not None else None,
+        ds.field("Year") <= end_year if end_year is not None else None,
+    ):
+        if term is not None:
+            expr = term if expr is None else expr & term
+    return expr
+
+
+def partition_files(states=None, start_year=None, end_year=None, out_dir=PARTITION_DIR):
+    """Parquet files a State / year-range query has to open (the rest are pruned by path)."""
+    fragments = _open(out_dir).get_fragments(filter=_partition_filter(states, start_year, end_year))
+    return [fragment.path for fragment in fragments]
+
+
+def read_partitions(states=None, start_year=None, end_year=None, counties=None, cities=None,
+                    columns=None, out_dir=PARTITION_DIR):
+    """
+    Read only the State=/Year= partitions in range, then filter County/City.
+
+    Returns the compact-frame dtypes (categorical locations, float32
+    measurements, int16 Year) in source CSV order. columns=None returns
+    Date, locations, Year and the pollutant targets.
+    """
+    expr = _partition_filter(states, start_year, end_year)
+    for col, values in (("County", counties), ("City", cities)):
+        if values is not None:
+            term = ds.field(col).isin(list(values))
+            expr = term if expr is None else expr & term
+
+    wanted = columns or ["Date"] + LOCATION_COLUMNS + ["Year"] + POLLUTANT_TARGETS
+    table = _open(out_dir).to_table(columns=["_row"] + wanted, filter=expr)
+    df = table.to_pandas().sort_values("_row").drop(columns="_row").reset_index(drop=True)
+
+    for col in LOCATION_COLUMNS:
+        if col in df:
+            df[col] = df[col].astype("category")
+    if "Year" in df:
+        df["Year"] = df["Year"].astype("int16")
+    if "Date" in df:
+        df["Date"] = df["Date"].astype("datetime64[ns]")
+    return df
+
+
+def _bytes(paths):
+    return sum(os.path.getsize(p) for p in paths)
+
+
+def benchmark(filepath=DATASET_PATH, out_dir=PARTITION_DIR, train_start_year=2020):
+    """Bytes touched and read time for typical queries: partitions vs. the whole CSV."""
+    sample = read_partitions(start_year=train_start_year, columns=["State", "City"], out_dir=out_dir).iloc[0]
+    state, city = str(sample["State"]), str(sample["City"])
+    queries = {
+        f"city history ({city}, {state}, {EARLIEST_YEAR}+)":
+            ({"states": [state], "start_year": EARLIEST_YEAR}, {"cities": [city]}),
+        f"training range ({train_start_year}+)": ({"start_year": train_start_year}, {}),
+        f"compact dataset ({EARLIEST_YEAR}+)": ({"start_year": EARLIEST_YEAR}, {}),
+    }
+
+    t0 = time.perf_counter()
+    read_clean_csv(ensure_dataset(filepath))
+    rows = [{"query": "full CSV (any query)", "files": 1, "MB": os.path.getsize(filepath) / 1024 ** 2,
+             "rows": None, "read_s": time.perf_counter() - t0}]
+    for name, (pruning, filters) in queries.items():
+        files = partition_files(out_dir=out_dir, **pruning)
+        t0 = time.perf_counter()
+        df = read_partitions(out_dir=out_dir, **pruning, **filters)
+        rows.append({"query": name, "files": len(files), "MB": _bytes(files) / 1024 ** 2,
+                     "rows": len(df), "read_s": time.perf_counter() - t0})
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the State=/Year= partitioned parquet copy of the dataset.")
+    parser.add_argument("--source", default=DATASET_PATH, help="source CSV")
+    parser.add_argument("--out", default=PARTITION_DIR, help="partition root directory")
+    parser.add_argument("--bench", action="store_true", help="compare bytes read per query with the full CSV")
+    args = parser.parse_args()
+
+    if not args.bench or not partitions_current(args.source, args.out):
+        t0 = time.perf_counter()
+        n_rows = build_partitions(args.source, args.out)
+        files = partition_files(out_dir=args.out)
+        print(f"✅ Wrote {n_rows:,} rows to {len(files):,} partitions under {args.out} "
+              f"({_bytes(files) / 1024 ** 2:.1f} MB) in {time.perf_counter() - t0:.1f} s")
+
+    if args.bench:
+        report = benchmark(args.source, args.out)
+        print("\n📊 Bytes touched per query:")
+        print(report.to_string(index=False, float_format="{:.3f}".format))
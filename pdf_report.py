@@ -0,0 +1,92 @@
+import pandas as pd
+from io import BytesIO
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+
+
+def build_pdf_report(location_info, category, current_aqi, avg_aqi, dominant_pollutant, risk_level, input_values):
+    """Render the analytics PDF and return its bytes (runs in a background worker)."""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    styles = getSampleStyleSheet()
+    story = []
+
+    title_style = styles['Heading1']
+    title_style.alignment = 1
+    story.append(Paragraph("AIR QUALITY ANALYTICS REPORT", title_style))
+    story.append(Spacer(1, 20))
+
+    summary_data = [
+        ["Location", f"{location_info['city']}, {location_info['region']}"],
+        ["Predicted AQI Category", category.replace('_', ' ')],
+        ["Overall AQI", f"{current_aqi:.1f}"],
+        ["Report Date", pd.Timestamp.today().strftime("%Y-%m-%d")]
+    ]
+
+    summary_table = Table(summary_data, colWidths=[200, 200])
+    summary_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, -1), colors.lightblue),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+        ('GRID', (0, 0), (-1, -1), 1, colors.white)
+    ]))
+    story.append(summary_table)
+    story.append(Spacer(1, 20))
+
+    heading_style = styles['Heading2']
+    story.append(Paragraph("KEY PERFORMANCE INDICATORS", heading_style))
+    story.append(Spacer(1, 12))
+
+    metrics_data = [
+        ["Metric", "Value", "Status"],
+        ["Average AQI", f"{avg_aqi:.1f}", "Good" if avg_aqi <= 50 else "Moderate" if avg_aqi <= 100 else "Poor"],
+        ["Primary Pollutant", dominant_pollutant.split()[0], "Dominant"],
+        ["Risk Level", risk_level, "⚠️" if risk_level == "High" else "ℹ️" if risk_level == "Medium" else "✅"],
+        ["Classification", "If-Else AQI Logic", "Rule-based Category"]
+    ]
+
+    metrics_table = Table(metrics_data, colWidths=[150, 120, 100])
+    metrics_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('GRID', (0, 0), (-1, -1), 1, colors.steelblue)
+    ]))
+    story.append(metrics_table)
+    story.append(Spacer(1, 20))
+
+    story.append(Paragraph("POLLUTANT BREAKDOWN", heading_style))
+    story.append(Spacer(1, 12))
+    pollutant_data = [["Pollutant", "AQI Value"]] + [[k, f"{v:.1f}"] for k, v in input_values.items()]
+    pollutant_table = Table(pollutant_data, colWidths=[250, 150])
+    pollutant_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('GRID', (0, 0), (-1, -1), 1, colors.green)
+    ]))
+    story.append(pollutant_table)
+    story.append(Spacer(1, 20))
+
+    story.append(Paragraph("Classification Method", heading_style))
+    story.append(Spacer(1, 12))
+    story.append(Paragraph("""
+    Air Quality Category is determined using <b>EPA standard AQI thresholds</b> with 
+    <b>if-else conditional logic</b> instead of a separate machine learning classifier.
+    This ensures transparent, explainable results aligned with standard public health criteria.
+    """, styles['BodyText']))
+    story.append(Spacer(1, 20))
+
+    footer_style = styles['Italic']
+    footer_style.alignment = 1
+    story.append(Paragraph("Generated by Air Quality Analytics System", footer_style))
+    story.append(Paragraph(f"Report generated on: {pd.Timestamp.today().strftime('%Y-%m-%d %H:%M:%S')}", footer_style))
+
+    doc.build(story)
+    return buffer.getvalue()
@@ -0,0 +1,209 @@
+import os
+import re
+import json
+import time
+import argparse
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from data_store import POLLUTANT_TARGETS
+from model_store import INTERVAL_QUANTILES, interval_targets, save_model, load_model, store_size_mb
+from train_model import load_training_data, build_pipeline, evaluate_model
+
+SHARD_DIR = "models/shards"
+# --compare writes here, never to SHARD_DIR, so the app keeps serving the production models
+COMPARE_SHARD_DIR = "models/compare_shards"
+COMPARE_GLOBAL_DIR = "models/compare_global"
+DEFAULT_MAX_RESIDENT = 8
+
+
+def _shard_name(state):
+    return re.sub(r"[^A-Za-z0-9]+", "_", state).strip("_").lower()
+
+
+def _fit_shard(state, X_train, y_train, model_dir, params):
+    """Worker: fit one State's pipeline and publish it as a flat model store."""
+    t0 = time.perf_counter()
+    # One core per shard; the process pool provides the parallelism
+    pipeline = build_pipeline(**params, n_jobs=1)
+    pipeline.fit(X_train, y_train)
+    save_model(pipeline, model_dir, extra_meta={"state": state})
+    return state, time.perf_counter() - t0
+
+
+def train_shards(X_train, y_train, shard_dir=SHARD_DIR, max_workers=None, **params):
+    """Train one model per State in a process pool; returns {state: fit seconds}."""
+    os.makedirs(shard_dir, exist_ok=True)
+    states = sorted(X_train["State"].astype(str).unique())
+    index = {state: _shard_name(state) for state in states}
+    row_state = X_train["State"].astype(str).to_numpy()
+
+    fit_seconds = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = []
+        for state in states:
+            mask = row_state == state
+            futures.append(pool.submit(
+                _fit_shard, state, X_train[mask], y_train[mask],
+                os.path.join(shard_dir, index[state]), params,
+            ))
+        for future in futures:
+            state, seconds = future.result()
+            fit_seconds[state] = seconds
+
+    # Published last, so the app only sees a complete shard set
+    with open(os.path.join(shard_dir, "shards.json"), "w") as f:
+        json.dump(index, f, indent=2)
+    return fit_seconds
+
+
+def shards_exist(shard_dir=SHARD_DIR):
+    return os.path.exists(os.path.join(shard_dir, "shards.json"))
+
+
+class ShardedModel:
+    """
+    Routes each row to its State's model, loading shards lazily.
+
+    At most max_resident shards stay loaded; the least recently used one is
+    dropped when another is needed. Safe to share across Streamlit threads.
+    """
+
+    def __init__(self, shard_dir=SHARD_DIR, max_resident=DEFAULT_MAX_RESIDENT):
+        self.shard_dir = shard_dir
+        self.max_resident = max_resident
+        with open(os.path.join(shard_dir, "shards.json")) as f:
+            self.index = json.load(f)
+        self.targets = list(POLLUTANT_TARGETS)
+        self.interval_targets = interval_targets(self.targets)
+        self._resident = OrderedDict()
+        self._lock = threading.Lock()
+
+    def shard(self, state):
+        with self._lock:
+            if state in self._resident:
+                self._resident.move_to_end(state)
+                return self._resident[state]
+            if state not in self.index:
+                raise KeyError(f"No model shard for state {state!r}")
+
+            model = load_model(os.path.join(self.shard_dir, self.index[state]))
+            self._resident[state] = model
+            while len(self._resident) > self.max_resident:
+                self._resident.popitem(last=False)
+            return model
+
+    def predict(self, X):
+        states = X["State"].astype(str).to_numpy()
+        out = np.empty((len(X), len(self.targets)))
+        for state in pd.unique(states):
+            rows = np.flatnonzero(states == state)
+            out[rows] = self.shard(state).predict(X.iloc[rows])
+        return out
+
+    def predict_interval(self, X, quantiles=INTERVAL_QUANTILES):
+        states = X["State"].astype(str).to_numpy()
+        out = (np.empty((len(X), len(self.targets))),) + \
+            tuple(np.empty((len(X), len(self.interval_targets))) for _ in range(2))
+        for state in pd.unique(states):
+            rows = np.flatnonzero(states == state)
+            for full, part in zip(out, self.shard(state).predict_interval(X.iloc[rows], quantiles)):
+                full[rows] = part
+        return out
+
+    def predict_one(self, state, county, city, date):
+        return self.shard(state).predict_one(state, county, city, date)
+
+    def predict_one_interval(self, state, county, city, date, quantiles=INTERVAL_QUANTILES):
+        return self.shard(state).predict_one_interval(state, county, city, date, quantiles)
+
+    def mapped_mb(self):
+        """Size of the node arrays mapped by currently resident shards (an upper bound, not RSS)."""
+        with self._lock:
+            models = list(self._resident.values())
+        return sum(_mapped_mb(m) for m in models)
+
+
+def _mapped_mb(model):
+    arrays = ("feature", "threshold", "left", "right", "leaf_index", "leaf_values")
+    return sum(getattr(model, name).nbytes for name in arrays) / 1024 ** 2
+
+
+def _single_row_latency_ms(model, X, n=50):
+    rows = X.sample(n=min(n, len(X)), random_state=0)
+    model.predict(rows)   # warm-up: lazy shard loads and first page faults are not per-request cost
+    t0 = time.perf_counter()
+    for i in range(len(rows)):
+        model.predict(rows.iloc[[i]])
+    return 1000 * (time.perf_counter() - t0) / len(rows)
+
+
+def compare_with_global(shard_dir=COMPARE_SHARD_DIR, global_dir=COMPARE_GLOBAL_DIR, max_workers=None, **params):
+    """Train global and sharded models on the same split and report cost and accuracy."""
+    X_reg, y_reg = load_training_data()
+    X_train, X_test, y_train, y_test = train_test_split(
+        X_reg, y_reg, test_size=0.2, random_state=42
+    )
+
+    t0 = time.perf_counter()
+    pipeline = build_pipeline(**params)
+    pipeline.fit(X_train, y_train)
+    global_fit = time.perf_counter() - t0
+    save_model(pipeline, global_dir)
+    global_model = load_model(global_dir)
+
+    t0 = time.perf_counter()
+    train_shards(X_train, y_train, shard_dir, max_workers, **params)
+    sharded_fit = time.perf_counter() - t0
+    sharded = ShardedModel(shard_dir)
+
+    rows = []
+    for name, model, fit_s, size_mb in [
+        ("global", global_model, global_fit, store_size_mb(global_dir)),
+        ("sharded", sharded, sharded_fit,
+         sum(store_size_mb(os.path.join(shard_dir, d)) for d in sharded.index.values())),
+    ]:
+        metrics = evaluate_model(model, X_test, y_test)
+        latency = _single_row_latency_ms(model, X_test)
+        mapped = model.mapped_mb() if name == "sharded" else _mapped_mb(model)
+        rows.append({
+            "model": name, "train_s": fit_s, "latency_ms": latency,
+            "store_mb": size_mb, "mapped_mb": mapped,
+            "mae": metrics["mae"], "r2": metrics["r2"],
+        })
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train one model per State in parallel.")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: all cores)")
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--max-depth", type=int, default=None)
+    parser.add_argument("--min-samples-leaf", type=int, default=1)
+    parser.add_argument("--compare", action="store_true",
+                        help=f"train global and sharded models under {COMPARE_SHARD_DIR} / {COMPARE_GLOBAL_DIR} "
+                             "and compare (production shards are left alone)")
+    args = parser.parse_args()
+    params = {
+        "n_estimators": args.n_estimators,
+        "max_depth": args.max_depth,
+        "min_samples_leaf": args.min_samples_leaf,
+    }
+
+    if args.compare:
+        report = compare_with_global(max_workers=args.workers, **params)
+        print("\n📊 Global vs per-State sharded model:")
+        print(report.to_string(index=False, float_format="{:.3f}".format))
+    else:
+        X_reg, y_reg = load_training_data()
+        X_train, X_test, y_train, y_test = train_test_split(
+            X_reg, y_reg, test_size=0.2, random_state=42
+        )
+        t0 = time.perf_counter()
+        fit_seconds = train_shards(X_train, y_train, max_workers=args.workers, **params)
+        print(f"✅ Trained {len(fit_seconds)} State shards in {time.perf_counter() - t0:.1f} s")
+        metrics = evaluate_model(ShardedModel(), X_test, y_test)
+        print(f"📊 MAE {metrics['mae']:.3f} | R² {metrics['r2']:.3f}")
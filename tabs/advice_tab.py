@@ -2,6 +2,9 @@ import streamlit as st
 import os
 from dotenv import load_dotenv
 import google.generativeai as genai
+from llm_gateway import get_gateway
+from jobs import get_executor
+from tabs.job_status import show_job_status
 
 
 load_dotenv()
@@ -101,8 +104,10 @@ def get_gemini_advice(question: str, air_quality_context: dict) -> str:
         Keep your response concise and practical, under 200 words.
         """
 
-        response = model.generate_content(context_prompt)
-        return response.text.strip()
+        # Shared across sessions: identical in-flight prompts make one call, within the rate limit
+        return get_gateway().generate(
+            context_prompt, lambda: model.generate_content(context_prompt).text.strip()
+        )
 
     except Exception as e:
        
@@ -110,6 +115,12 @@ def get_gemini_advice(question: str, air_quality_context: dict) -> str:
         return f"⚠️ AI service unavailable, showing fallback advice:\n\n{fallback}"
 
 
+def _add_ai_response(ai_response):
+    st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
+    st.session_state.pop("advice_job", None)
+    st.rerun()
+
+
 def show_ai_chat_interface(air_quality_context: dict):
     """Show the AI chat interface for additional advice"""
     st.markdown("---")
@@ -134,14 +145,19 @@ def show_ai_chat_interface(air_quality_context: dict):
         with st.chat_message("user"):
             st.markdown(prompt)
         
-        
+        # Answered on the shared thread pool; the session stays responsive meanwhile
+        st.session_state.advice_job = get_executor().submit(
+            "advice", get_gemini_advice, prompt, air_quality_context
+        )
+
+    if st.session_state.get("advice_job"):
         with st.chat_message("assistant"):
-            with st.spinner("🤔 Thinking..."):
-                ai_response = get_gemini_advice(prompt, air_quality_context)
-                st.markdown(ai_response)
-        
-        
-        st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
+            metrics = get_gateway().metrics()
+            pending = "🤔 Thinking..."
+            if metrics["waiting"] or metrics["queue_p95_s"] >= 1:
+                pending = (f"⏳ Advisor is busy: {metrics['waiting']} queued, "
+                           f"p95 wait {metrics['queue_p95_s']:.1f} s")
+            show_job_status("advice_job", pending, _add_ai_response)
 
 def show_advice_tab():
     st.header("💡 Air Quality Advice & Recommendations")
@@ -4,6 +4,8 @@ import smtplib
 import ssl
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from jobs import get_executor
+from tabs.job_status import show_job_status
 
 
 def send_email(smtp_server, port, sender_email, sender_pass, to_email, subject, body):
@@ -26,6 +28,24 @@ def send_email(smtp_server, port, sender_email, sender_pass, to_email, subject,
         return f"FAILED ❌ ({e})"
 
 
+def send_bulk(smtp_server, port, sender_email, sender_pass, emails, subject, body, progress=None):
+    """Send the same message to every address; reports progress after each one."""
+    results = []
+    for i, email in enumerate(emails):
+        status = send_email(smtp_server, port, sender_email, sender_pass, email, subject, body)
+        results.append({"to": email, "status": status})
+        if progress:
+            progress((i + 1) / len(emails), f"📡 Sent {i + 1} of {len(emails)} emails...")
+    return results
+
+
+def _show_delivery_report(results):
+    st.subheader("📊 Delivery Report")
+    st.dataframe(pd.DataFrame(results))
+
+    st.success("✅ Email broadcast finished. Check your mailbox or server logs for confirmation.")
+
+
 def show_alerts_tab():
     st.header("📧 Air Quality Email Alerts")
     st.info("Upload a CSV with a column **email**. Each listed email will receive the advisory message.")
@@ -72,16 +92,10 @@ def show_alerts_tab():
                 st.error("❌ Message cannot be empty.")
                 return
 
-            results = []
-            with st.spinner("📡 Sending emails..."):
-                for email in email_list:
-                    status = send_email(
-                        smtp_server, smtp_port, sender_email, sender_pass,
-                        email, subject.strip() or "Air Quality Alert", message.strip()
-                    )
-                    results.append({"to": email, "status": status})
-
-            st.subheader("📊 Delivery Report")
-            st.dataframe(pd.DataFrame(results))
+            # Sent on a worker thread so the page stays responsive; progress is polled below
+            st.session_state.alert_job = get_executor().submit(
+                "email", send_bulk, smtp_server, smtp_port, sender_email, sender_pass,
+                email_list, subject.strip() or "Air Quality Alert", message.strip(), progress=True
+            )
 
-            st.success("✅ Email broadcast finished. Check your mailbox or server logs for confirmation.")
\ No newline at end of file
+    show_job_status("alert_job", "📡 Sending emails...", _show_delivery_report)
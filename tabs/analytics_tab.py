@@ -2,11 +2,14 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from io import BytesIO
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
+from data_store import load_location_history
+from climatology import load_climatology
+from aqi_cube import CUBE_METRICS, load_cube, state_month_heatmap, county_ranking, seasonal_profile
+from jobs import get_executor
+from pdf_report import build_pdf_report
+from tabs.job_status import show_job_status
+from tabs.prediction_tab import interval_label, overall_interval
+from tabs.input_tab import ensure_detailed_prediction
 
 def get_aqi_color(category: str) -> str:
     color_map = {
@@ -18,6 +21,10 @@ def get_aqi_color(category: str) -> str:
     }
     return color_map.get(category, "#FFFF00")
 
+def ordinal(n: int) -> str:
+    suffix = "th" if 10 <= n % 100 <= 20 else {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th")
+    return f"{n}{suffix}"
+
 def show_analytics_tab():
     st.header("📊 Air Quality Analytics")
     
@@ -32,7 +39,9 @@ def show_analytics_tab():
     
     category = model_prediction["category"]
     current_aqi = model_prediction["overall_aqi"]
+    ensure_detailed_prediction()   # full 12-target model, only after an AQI-only fast-path prediction
     input_values = st.session_state.input_values
+    interval = st.session_state.get('prediction_interval')
     location_info = st.session_state.get('location_info', {'region': 'United States', 'city': 'Not specified'})
     
 
@@ -54,27 +63,40 @@ def show_analytics_tab():
     st.subheader("Predicted Pollutant Breakdown")
     
     pollutant_data = [{"Pollutant": k, "AQI Value": f"{v:.1f}"} for k, v in input_values.items()]
+    if interval:
+        for row in pollutant_data:
+            low, high = interval[row["Pollutant"]]
+            row[interval_label().capitalize()] = f"{low:.1f} – {high:.1f}"
     pollutant_df = pd.DataFrame(pollutant_data)
     st.dataframe(pollutant_df, use_container_width=True, hide_index=True)
     
-   
+    # Error bars: the per-tree interval around each prediction (never negative, even for older forecast tables)
+    error_bars = {}
+    if interval:
+        error_bars = {
+            "error_y": [max(interval[k][1] - v, 0.0) for k, v in input_values.items()],
+            "error_y_minus": [max(v - interval[k][0], 0.0) for k, v in input_values.items()],
+        }
     fig_bar = px.bar(
         x=list(input_values.keys()), 
         y=list(input_values.values()),
         title="Predicted Pollutant Metrics",
         color=list(input_values.keys()),
         color_discrete_sequence=px.colors.qualitative.Set2,
-        labels={'x': 'Pollutant', 'y': 'AQI Value'}
+        labels={'x': 'Pollutant', 'y': 'AQI Value'},
+        **error_bars
     )
     fig_bar.update_layout(showlegend=False)
     st.plotly_chart(fig_bar, use_container_width=True)
     
   
     st.subheader("AQI Indicator")
+    overall_range = overall_interval(interval, current_aqi)
+    range_text = f"<br><sup>{interval_label()}: {overall_range[0]:.0f}–{overall_range[1]:.0f}</sup>" if overall_range else ""
     fig_gauge = go.Figure(go.Indicator(
         mode="gauge+number",
         value=current_aqi,
-        title={'text': f"AQI: {category.replace('_', ' ')}"},
+        title={'text': f"AQI: {category.replace('_', ' ')}{range_text}"},
         gauge={
             'axis': {'range': [0, 300]},
             'bar': {'color': get_aqi_color(category)},
@@ -91,18 +113,11 @@ def show_analytics_tab():
     
   
     st.subheader("📈 Historical vs Current AQI")
+    city = location_info["city"].replace(" City", "")
+    state = location_info["region"].replace(" State", "").replace(" County", "")
     try:
-        df = pd.read_csv("data/US_air_pollution_dataset_2000_2023.csv")
-        df["Date"] = pd.to_datetime(df["Date"])
-        
-        if "Overall_AQI" not in df.columns:
-            df["Overall_AQI"] = df[["O3 AQI", "CO AQI", "SO2 AQI", "NO2 AQI"]].max(axis=1)
-
-        city = location_info["city"].replace(" City", "")
-        state = location_info["region"].replace(" State", "").replace(" County", "")
-
-        hist = df[(df["City"] == city) & (df["State"] == state)]
-        hist = hist[hist["Date"].dt.year >= 2015]
+        # Only this State's partitions (or a view of the shared compact frame if it is loaded)
+        hist = load_location_history(state, city)
 
         if not hist.empty:
             hist = hist.groupby("Date")["Overall_AQI"].mean().reset_index()
@@ -120,7 +135,10 @@ def show_analytics_tab():
                 name="Current Prediction",
                 text=[f"Pred: {current_aqi:.0f}"],
                 textposition="top center",
-                marker=dict(color=get_aqi_color(category), size=12, symbol="star")
+                marker=dict(color=get_aqi_color(category), size=12, symbol="star"),
+                error_y=dict(type="data", symmetric=False,
+                             array=[overall_range[1] - current_aqi],
+                             arrayminus=[current_aqi - overall_range[0]]) if overall_range else None
             ))
             fig.update_layout(title=f"Historical AQI vs Current Prediction ({city}, {state})",
                               xaxis_title="Date", yaxis_title="AQI")
@@ -129,97 +147,132 @@ def show_analytics_tab():
             st.info(f"No historical data available for {city}, {state}.")
     except Exception as e:
         st.error(f"Error loading historical data: {e}")
-    
+
   
+    st.subheader("📅 Seasonal Context")
+    try:
+        climatology = load_climatology()
+        county = location_info.get("county", "")
+        date = pd.Timestamp(location_info.get("date", pd.Timestamp.today()))
+        month_name = date.strftime("%B")
+        rank = climatology.percentile_rank(state, county, city, date.month, current_aqi)
+
+        if rank is not None:
+            st.markdown(
+                f"Predicted AQI **{current_aqi:.0f}** is around the **{ordinal(round(rank))} percentile** "
+                f"of {month_name} days in {city}, {state} (2015 onward)."
+            )
+
+            context_rows = []
+            for metric in ["Overall_AQI", "O3 AQI", "CO AQI", "SO2 AQI", "NO2 AQI"]:
+                predicted = current_aqi if metric == "Overall_AQI" else input_values.get(metric)
+                if predicted is None:
+                    continue
+                stats = climatology.lookup(state, county, city, date.month)[metric]
+                context_rows.append({
+                    "Metric": metric.replace("_", " "),
+                    "Predicted": f"{predicted:.1f}",
+                    f"{month_name} Median": f"{stats['p50']:.1f}",
+                    f"{month_name} 10th–90th": f"{stats['p10']:.0f} – {stats['p90']:.0f}",
+                    "Percentile": f"{climatology.percentile_rank(state, county, city, date.month, predicted, metric):.0f}",
+                })
+            st.dataframe(pd.DataFrame(context_rows), use_container_width=True, hide_index=True)
+
+            profile = climatology.monthly_profile(state, county, city)
+            fig_clim = go.Figure()
+            fig_clim.add_trace(go.Scatter(
+                x=profile["Month"], y=profile["p90"], mode="lines",
+                line=dict(width=0), showlegend=False, hoverinfo="skip"
+            ))
+            fig_clim.add_trace(go.Scatter(
+                x=profile["Month"], y=profile["p10"], mode="lines", fill="tonexty",
+                fillcolor="rgba(52, 152, 219, 0.25)", line=dict(width=0), name="10th–90th percentile"
+            ))
+            fig_clim.add_trace(go.Scatter(
+                x=profile["Month"], y=profile["p50"], mode="lines+markers",
+                name="Median", line=dict(color="blue", width=2)
+            ))
+            fig_clim.add_trace(go.Scatter(
+                x=[date.month], y=[current_aqi], mode="markers", name="Prediction",
+                marker=dict(color=get_aqi_color(category), size=14, symbol="star")
+            ))
+            fig_clim.update_layout(title=f"Monthly AQI Climatology ({city}, {state})",
+                                   xaxis_title="Month", yaxis_title="AQI")
+            st.plotly_chart(fig_clim, use_container_width=True)
+        else:
+            st.info(f"No {month_name} history available for {city}, {state}.")
+    except Exception as e:
+        st.error(f"Error loading seasonal context: {e}")
+
+
+    st.subheader("🗺️ Regional Overview")
+    try:
+        cube = load_cube()
+        col1, col2 = st.columns(2)
+        with col1:
+            metric = st.selectbox("Pollutant", CUBE_METRICS, key="regional_metric",
+                                  format_func=lambda m: m.replace("_", " "))
+        with col2:
+            years = sorted(cube["Year"].unique().tolist(), reverse=True)
+            year = st.selectbox("Year", ["All years"] + years, key="regional_year")
+        year = None if year == "All years" else year
+
+        heatmap = state_month_heatmap(cube, metric, year)
+        fig_heat = px.imshow(
+            heatmap, aspect="auto", color_continuous_scale="RdYlGn_r",
+            labels=dict(x="Month", y="State", color="Mean AQI"),
+            title=f"Mean {metric.replace('_', ' ')} by State and Month"
+        )
+        st.plotly_chart(fig_heat, use_container_width=True)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            ranking = county_ranking(cube, state, metric, year)
+            if not ranking.empty:
+                fig_rank = px.bar(
+                    ranking, x="mean", y="County", orientation="h",
+                    color="mean", color_continuous_scale="RdYlGn_r",
+                    labels={"mean": "Mean AQI"}, title=f"County Ranking ({state})"
+                )
+                fig_rank.update_layout(yaxis=dict(autorange="reversed"), coloraxis_showscale=False)
+                st.plotly_chart(fig_rank, use_container_width=True)
+            else:
+                st.info(f"No county data available for {state}.")
+        with col2:
+            county = location_info.get("county")
+            profile = seasonal_profile(cube, state, county, metric)
+            area = f"{county} County, {state}"
+            if profile.empty:
+                profile = seasonal_profile(cube, state, metric=metric)
+                area = state
+            if not profile.empty:
+                fig_season = go.Figure()
+                for column, name, style in [("mean", "Mean", "solid"), ("p90", "90th percentile", "dash"),
+                                            ("max", "Max", "dot")]:
+                    fig_season.add_trace(go.Scatter(
+                        x=profile["Month"], y=profile[column], mode="lines+markers",
+                        name=name, line=dict(dash=style)
+                    ))
+                fig_season.update_layout(title=f"Seasonal Profile ({area})",
+                                         xaxis_title="Month", yaxis_title="AQI")
+                st.plotly_chart(fig_season, use_container_width=True)
+    except Exception as e:
+        st.error(f"Error loading regional overview: {e}")
+
+
     st.subheader("📥 Download Analytics Report")
     
     col1, col2, col3 = st.columns([190, 160, 80])
     with col2:
         if st.button("Download PDF Report"):
-            buffer = BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=A4)
-            styles = getSampleStyleSheet()
-            story = []
-
-            title_style = styles['Heading1']
-            title_style.alignment = 1
-            story.append(Paragraph("AIR QUALITY ANALYTICS REPORT", title_style))
-            story.append(Spacer(1, 20))
-            
-            summary_data = [
-                ["Location", f"{location_info['city']}, {location_info['region']}"],
-                ["Predicted AQI Category", category.replace('_', ' ')],
-                ["Overall AQI", f"{current_aqi:.1f}"],
-                ["Report Date", pd.Timestamp.today().strftime("%Y-%m-%d")]
-            ]
-            
-            summary_table = Table(summary_data, colWidths=[200, 200])
-            summary_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, -1), colors.lightblue),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-                ('GRID', (0, 0), (-1, -1), 1, colors.white)
-            ]))
-            story.append(summary_table)
-            story.append(Spacer(1, 20))
-
-            heading_style = styles['Heading2']
-            story.append(Paragraph("KEY PERFORMANCE INDICATORS", heading_style))
-            story.append(Spacer(1, 12))
-            
-            metrics_data = [
-                ["Metric", "Value", "Status"],
-                ["Average AQI", f"{avg_aqi:.1f}", "Good" if avg_aqi <= 50 else "Moderate" if avg_aqi <= 100 else "Poor"],
-                ["Primary Pollutant", dominant_pollutant.split()[0], "Dominant"],
-                ["Risk Level", risk_level, "⚠️" if risk_level == "High" else "ℹ️" if risk_level == "Medium" else "✅"],
-                ["Classification", "If-Else AQI Logic", "Rule-based Category"]
-            ]
-            
-            metrics_table = Table(metrics_data, colWidths=[150, 120, 100])
-            metrics_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.steelblue)
-            ]))
-            story.append(metrics_table)
-            story.append(Spacer(1, 20))
-
-            story.append(Paragraph("POLLUTANT BREAKDOWN", heading_style))
-            story.append(Spacer(1, 12))
-            pollutant_data = [["Pollutant", "AQI Value"]] + [[k, f"{v:.1f}"] for k, v in input_values.items()]
-            pollutant_table = Table(pollutant_data, colWidths=[250, 150])
-            pollutant_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.green)
-            ]))
-            story.append(pollutant_table)
-            story.append(Spacer(1, 20))
-
-            story.append(Paragraph("Classification Method", heading_style))
-            story.append(Spacer(1, 12))
-            story.append(Paragraph("""
-            Air Quality Category is determined using <b>EPA standard AQI thresholds</b> with 
-            <b>if-else conditional logic</b> instead of a separate machine learning classifier.
-            This ensures transparent, explainable results aligned with standard public health criteria.
-            """, styles['BodyText']))
-            story.append(Spacer(1, 20))
-
-            footer_style = styles['Italic']
-            footer_style.alignment = 1
-            story.append(Paragraph("Generated by Air Quality Analytics System", footer_style))
-            story.append(Paragraph(f"Report generated on: {pd.Timestamp.today().strftime('%Y-%m-%d %H:%M:%S')}", footer_style))
-
-            doc.build(story)
-            st.download_button(
-                label="📥 Download PDF Report",
-                data=buffer.getvalue(),
-                file_name="air_quality_report.pdf",
-                mime="application/pdf"
+            # Rendered in the shared process pool; the status below polls it
+            st.session_state.pdf_job = get_executor().submit(
+                "pdf", build_pdf_report, location_info, category, current_aqi,
+                avg_aqi, dominant_pollutant, risk_level, dict(input_values), pool="process"
             )
+        show_job_status("pdf_job", "📄 Building PDF report...", lambda pdf: st.download_button(
+            label="📥 Download PDF Report",
+            data=pdf,
+            file_name="air_quality_report.pdf",
+            mime="application/pdf"
+        ))
@@ -1,34 +1,84 @@
 import streamlit as st
-import pandas as pd
 import os
-import gdown
 from train_model import train_regression_model   # ✅ Import the training function
+from fetch import file_lock
+from forecast_table import lookup_forecast, lookup_forecast_interval
+from climatology import load_climatology
+from tabs.prediction_tab import summarize_prediction
+from model_store import AQI_MODEL_DIR, MODEL_DIR, model_exists, save_model, load_model
+from sharded_model import ShardedModel, shards_exist
+from data_store import DATASET_PATH, POLLUTANT_TARGETS, load_locations
+from location_search import load_location_index, location_label
 
-@st.cache_data
-def load_dataset():
-    """Load dataset from Google Drive if not found locally."""
-    dataset_path = "data/US_air_pollution_dataset_2000_2023.csv"
-    drive_url = "https://drive.google.com/uc?id=1aYtfI7ZnJFUwVoxsWj-9s2TVUOIL0vCW"
+# Widget keys app.py keeps alive while another view is shown
+INPUT_WIDGET_KEYS = ["input_state", "input_county", "input_city", "input_date"]
+
+def _reset_inputs(*keys):
+    """Drop dependent selections when a parent selector changes (their options change too)."""
+    for key in keys:
+        st.session_state.pop(key, None)
+
+def _apply_search_hit(state, county, city):
+    """Fill the State/County/City selectors from a search result (runs before the rerun)."""
+    st.session_state.input_state = state
+    st.session_state.input_county = f"{county} County"
+    st.session_state.input_city = f"{city} City"
+    st.session_state.location_search = ""
 
-    # ✅ Download only if not present
-    if not os.path.exists(dataset_path):
+def load_dataset():
+    """Unique post-2020 locations from the shared compact dataset (downloaded on first use)."""
+    # ✅ load_locations() fetches the dataset on first use; tell the user why it's slow
+    if not os.path.exists(DATASET_PATH):
         st.info("📥 Downloading dataset from Google Drive (first time only)...")
-        os.makedirs("data", exist_ok=True)
-        gdown.download(drive_url, dataset_path, quiet=False)
 
-    # ✅ Preprocess
-    df = pd.read_csv(dataset_path)
-    df = df.drop_duplicates()
-    df = df.fillna(df.median(numeric_only=True))
-    df["Date"] = pd.to_datetime(df["Date"])
-    df = df[df["Date"].dt.year >= 2020]
-    return df
+    # ✅ Process-wide cache shared with training and analytics (no per-session copies)
+    return load_locations(start_year=2020)
 
 @st.cache_resource
 def load_models():
-    """Automatically train model at startup instead of loading .pkl"""
-    reg_model = train_regression_model()   # ✅ Auto-train model
-    return reg_model
+    """Load the memory-mapped model store, training and saving it on first start."""
+    if shards_exist():
+        return ShardedModel()   # ✅ Per-State shards, loaded lazily on first use
+    if not model_exists():
+        # ✅ Auto-train once per host: other processes wait on the lock, then load the result
+        os.makedirs(os.path.dirname(MODEL_DIR), exist_ok=True)
+        with file_lock(MODEL_DIR + ".lock"):
+            if not model_exists():
+                save_model(train_regression_model())
+    return load_model()   # ✅ Tree arrays shared read-only across processes
+
+@st.cache_resource
+def load_aqi_model():
+    """AQI-only fast-path store if one was built (python model_store.py --aqi-only), else None."""
+    return load_model(AQI_MODEL_DIR) if model_exists(AQI_MODEL_DIR) else None
+
+def predict_live(reg_model, state, county, city, date):
+    """Run the model for one location/date: its targets' values and their {name: (low, high)} interval."""
+    # --- Predict pollutant metrics (regression only) ---
+    # Direct one-hot row encoding, and the interval comes from the same pass over the trees
+    y_pred_reg, lower, upper = reg_model.predict_one_interval(state, county, city, date)
+
+    return dict(zip(reg_model.targets, y_pred_reg)), dict(zip(reg_model.interval_targets, zip(lower, upper)))
+
+def ensure_detailed_prediction():
+    """
+    After a fast-path prediction, fill in the Mean / 1st Max values from the
+    full model (loaded on first use). The AQI values, and so the category,
+    stay those of the fast path.
+    """
+    if not st.session_state.get("detail_pending"):
+        return
+    info = st.session_state.location_info
+    with st.spinner("Loading detailed pollutant model..."):
+        try:
+            full, full_interval = predict_live(load_models(), info["region"], info["county"], info["city"], info["date"])
+        except Exception as e:
+            st.warning(f"⚠️ Detailed pollutant values unavailable ({e}); showing AQI values only.")
+            return
+    fast, fast_interval = st.session_state.input_values, st.session_state.prediction_interval
+    st.session_state.input_values = {t: fast.get(t, full[t]) for t in POLLUTANT_TARGETS}
+    st.session_state.prediction_interval = {t: fast_interval.get(t, band) for t, band in full_interval.items()}
+    st.session_state.detail_pending = False
 
 def show_input_tab():
     st.markdown("""
@@ -39,7 +89,20 @@ def show_input_tab():
     """, unsafe_allow_html=True)
 
     df = load_dataset()
-    reg_model = load_models()   # ✅ Auto-trained model
+
+    # --- Type-ahead search: fills the selectors below ---
+    query = st.text_input("🔍 Search location", key="location_search",
+                          placeholder="Start typing a city, county or state, e.g. \"Phoenix, Maricopa\"")
+    if query:
+        hits = load_location_index(start_year=2020).search(query)
+        if hits:
+            hit_cols = st.columns(2)
+            for i, hit in enumerate(hits):
+                with hit_cols[i % 2]:
+                    st.button(location_label(*hit), key=f"search_hit_{i}", use_container_width=True,
+                              on_click=_apply_search_hit, args=hit)
+        else:
+            st.caption("No matching locations.")
 
     st.markdown("""
     <div style="background: white; padding: 20px; border-radius: 8px; border: 2px solid #bdc3c7; margin-bottom: 20px;">
@@ -49,21 +112,23 @@ def show_input_tab():
     
     with col1:
         states = sorted(df["State"].unique())
-        state = st.selectbox("🌎 Select State", states)
+        state = st.selectbox("🌎 Select State", states, key="input_state",
+                             on_change=_reset_inputs, args=("input_county", "input_city"))
         df_state = df[df["State"] == state]
         counties_raw = sorted(df_state["County"].unique())
         counties = [f"{c} County" for c in counties_raw]
-        county = st.selectbox("🏞️ Select County", counties)
+        county = st.selectbox("🏞️ Select County", counties, key="input_county",
+                              on_change=_reset_inputs, args=("input_city",))
         county_clean = county.replace(" County", "")
     
     with col2:
         df_filtered = df_state[df_state["County"] == county_clean]
         cities_raw = sorted(df_filtered["City"].unique())
         cities = [f"{c} City" for c in cities_raw]
-        city = st.selectbox("🏙️ Select City", cities)
+        city = st.selectbox("🏙️ Select City", cities, key="input_city")
         city_clean = city.replace(" City", "")
         
-        date = st.date_input("📅 Select Date")
+        date = st.date_input("📅 Select Date", key="input_date")
     
     st.markdown("</div>", unsafe_allow_html=True)
     
@@ -71,32 +136,37 @@ def show_input_tab():
     with col2:
         if st.button("🔮 Generate Prediction", use_container_width=True):
             with st.spinner("Calculating air quality prediction..."):
-                input_row = pd.DataFrame({
-                    "Date": [pd.to_datetime(date)],
-                    "State": [state],
-                    "County": [county_clean],
-                    "City": [city_clean]
-                })
-
-                input_row["Year"] = input_row["Date"].dt.year
-                input_row["Month"] = input_row["Date"].dt.month
-                input_row["Day"] = input_row["Date"].dt.day
-                input_row = input_row.drop(columns=["Date"])
-
-                # --- Predict pollutant metrics (regression only) ---
-                y_pred_reg = reg_model.predict(input_row)
-
-                pollutant_targets = [
-                    "O3 Mean", "O3 1st Max Value", "O3 AQI",
-                    "CO Mean", "CO 1st Max Value", "CO AQI",
-                    "SO2 Mean", "SO2 1st Max Value", "SO2 AQI",
-                    "NO2 Mean", "NO2 1st Max Value", "NO2 AQI"
-                ]
-                predicted_metrics = dict(zip(pollutant_targets, y_pred_reg[0]))
+                # --- Precomputed daily forecast first, live inference only on a miss ---
+                predicted_metrics = lookup_forecast(state, county_clean, city_clean, date)
+                interval = lookup_forecast_interval(state, county_clean, city_clean, date)
+                detail_pending = False
+                if predicted_metrics is None:
+                    try:
+                        # AQI-only fast path when built; the 12-target model loads when details are shown
+                        fast_model = load_aqi_model()
+                        detail_pending = fast_model is not None
+                        predicted_metrics, interval = predict_live(fast_model or load_models(),
+                                                                   state, county_clean, city_clean, date)
+                    except Exception as e:
+                        detail_pending = False
+                        # --- Model unavailable: fall back to the historical monthly mean ---
+                        predicted_metrics = load_climatology().estimate(state, county_clean, city_clean, date.month)
+                        if predicted_metrics is None:
+                            st.error(f"❌ Prediction failed and no historical data is available: {e}")
+                            return
+                        st.warning("⚠️ Model unavailable — showing the historical average for this city and month.")
 
                 st.session_state.input_values = predicted_metrics
+                # None when the prediction came from climatology or a table built without bounds
+                st.session_state.prediction_interval = interval
+                st.session_state.detail_pending = detail_pending
+                # Analytics/Advice read this even if the Prediction view is never opened
+                st.session_state.model_prediction = summarize_prediction(predicted_metrics)
                 st.session_state.prediction_made = True
-                st.session_state.location_info = {"region": state, "city": city_clean}
+                st.session_state.location_info = {
+                    "region": state, "city": city_clean, "county": county_clean, "date": date
+                }
+                st.session_state.pop("pdf_job", None)   # the last report was for the old prediction
 
             st.success("✅ Prediction generated! Please check the **Prediction tab** for results.")
             st.info(f"📍 **Selected Location:** {city_clean}, {county_clean}, {state} | **Date:** {date}")
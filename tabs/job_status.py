@@ -0,0 +1,49 @@
+import os
+import pandas as pd
+import streamlit as st
+from jobs import get_executor
+
+
+def show_job_status(session_key, pending_text, on_done, poll_seconds=1.0):
+    """
+    Show the background job whose id is in st.session_state[session_key].
+
+    While it runs, only this fragment reruns (every poll_seconds) to update
+    the progress bar; once it finishes the whole app reruns once and
+    on_done(result) renders the outcome. Nothing is shown without a job.
+    """
+    job_id = st.session_state.get(session_key)
+    job = get_executor().get(job_id) if job_id else None
+    if job is None:
+        st.session_state.pop(session_key, None)
+        return
+    was_running = not job.finished
+
+    @st.fragment(run_every=poll_seconds if was_running else None)
+    def status():
+        if not job.finished:
+            st.progress(job.progress, text=job.message or pending_text)
+            return
+        if was_running:
+            st.rerun()   # full rerun: stop polling and let on_done update the page
+        if job.error is not None:
+            st.error(f"❌ Background {job.kind} job failed: {job.error}")
+        else:
+            on_done(job.result)
+
+    status()
+
+
+def show_job_metrics():
+    """Admin expander with the shared executor's pool queues and per-kind wait/run times (set SHOW_JOB_METRICS=1)."""
+    if os.getenv("SHOW_JOB_METRICS", "0") != "1":
+        return
+    metrics = get_executor().metrics()
+    with st.expander("⚙️ Background jobs (this server process)"):
+        st.dataframe(pd.DataFrame.from_dict(metrics["pools"], orient="index").rename_axis("Pool"),
+                     use_container_width=True)
+        if metrics["kinds"]:
+            st.dataframe(pd.DataFrame.from_dict(metrics["kinds"], orient="index").rename_axis("Job").round(3),
+                         use_container_width=True)
+        else:
+            st.caption("No jobs completed yet.")
@@ -2,20 +2,17 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import os
+from bisect import bisect_left
+from model_store import CATEGORY_BREAKS, INTERVAL_QUANTILES, OVERALL_AQI
 
 feature_names = ["O3 AQI", "CO AQI", "SO2 AQI", "NO2 AQI"]
 
+# One name per CATEGORY_BREAKS bin, lowest first
+CATEGORY_NAMES = ["Good", "Moderate", "Unhealthy_Sensitive", "Unhealthy", "Very_Unhealthy"]
+
 def categorize_aqi(aqi_value: float) -> str:
-    if aqi_value <= 50:
-        return "Good"
-    elif aqi_value <= 100:
-        return "Moderate"
-    elif aqi_value <= 150:
-        return "Unhealthy_Sensitive"
-    elif aqi_value <= 200:
-        return "Unhealthy"
-    else:
-        return "Very_Unhealthy"
+    """EPA category: the first bin whose upper bound is >= aqi_value."""
+    return CATEGORY_NAMES[bisect_left(CATEGORY_BREAKS, aqi_value)]
 
 def get_category_color(category: str) -> str:
     color_map = {
@@ -27,6 +24,34 @@ def get_category_color(category: str) -> str:
     }
     return color_map.get(category, "#FFFF00")
 
+def summarize_prediction(y_pred_reg: dict) -> dict:
+    """Overall AQI (max of pollutant AQIs) and its EPA category."""
+    overall_aqi = float(np.max([
+        y_pred_reg["O3 AQI"], 
+        y_pred_reg["CO AQI"], 
+        y_pred_reg["SO2 AQI"], 
+        y_pred_reg["NO2 AQI"]
+    ]))
+    return {
+        "category": categorize_aqi(overall_aqi),
+        "overall_aqi": overall_aqi
+    }
+
+def interval_label() -> str:
+    low, high = INTERVAL_QUANTILES
+    return f"{high - low:.0%} range"
+
+def overall_interval(interval: dict, overall_aqi: float):
+    """
+    (low, high) for the Overall AQI, widened to contain overall_aqi, or None
+    without an interval. Only the model's per-tree Overall AQI band is used:
+    the pollutant bands can't be combined into one after the fact.
+    """
+    if not interval or OVERALL_AQI not in interval:
+        return None
+    low, high = interval[OVERALL_AQI]
+    return (min(low, overall_aqi), max(high, overall_aqi))
+
 def show_prediction_tab():
     st.header("🔮 US Air Quality Prediction")
     st.markdown("### Machine Learning Model Results Based on EPA Standards")
@@ -44,22 +69,15 @@ def show_prediction_tab():
     # ✅ Use stored prediction data directly
     y_pred_reg = st.session_state.input_values
 
-    # Determine category using if-else logic
-    overall_aqi = float(np.max([
-        y_pred_reg["O3 AQI"], 
-        y_pred_reg["CO AQI"], 
-        y_pred_reg["SO2 AQI"], 
-        y_pred_reg["NO2 AQI"]
-    ]))
-    category = categorize_aqi(overall_aqi)
-
     # Save to session
-    st.session_state.model_prediction = {
-        "category": category,
-        "overall_aqi": overall_aqi
-    }
+    st.session_state.model_prediction = summarize_prediction(y_pred_reg)
+    category = st.session_state.model_prediction["category"]
+    overall_aqi = st.session_state.model_prediction["overall_aqi"]
 
     location_info = st.session_state.get('location_info', {'region': 'United States', 'city': 'Not specified'})
+    interval = st.session_state.get('prediction_interval')
+    overall_range = overall_interval(interval, overall_aqi)
+    range_text = f" ({interval_label()}: {overall_range[0]:.0f}–{overall_range[1]:.0f})" if overall_range else ""
     
     # --- Display Results ---
     category_color = get_category_color(category)
@@ -68,7 +86,7 @@ def show_prediction_tab():
                 padding: 20px; border-radius: 8px; text-align: center; color: black; margin: 20px 0;
                 border: 2px solid #2c3e50;'>
         <h2 style='margin: 0; font-size: 28px; font-weight: bold;'>Air Quality: {category.replace("_", " ")}</h2>
-        <p style='margin: 10px 0; font-size: 20px;'><strong>Overall AQI: {overall_aqi:.0f}</strong></p>
+        <p style='margin: 10px 0; font-size: 20px;'><strong>Overall AQI: {overall_aqi:.0f}</strong>{range_text}</p>
         <p style='margin: 0; font-size: 14px;'>📍 {location_info['region']} | 🏙️ {location_info['city']}</p>
     </div>
     """, unsafe_allow_html=True)
@@ -82,4 +100,13 @@ def show_prediction_tab():
             y_pred_reg["SO2 AQI"], y_pred_reg["NO2 AQI"]
         ]
     }
+    if interval:
+        # Spread of the forest's individual trees for this location and date
+        pollutant_data[interval_label().capitalize()] = [
+            f"{interval[f][0]:.1f} – {interval[f][1]:.1f}" for f in feature_names
+        ]
     st.dataframe(pd.DataFrame(pollutant_data), use_container_width=True)
+    if interval:
+        low, high = INTERVAL_QUANTILES
+        st.caption(f"Range: {low:.0%}–{high:.0%} quantiles of the model's individual tree predictions "
+                   "(model uncertainty, not day-to-day variation).")
@@ -0,0 +1,93 @@
+import os
+from datetime import datetime
+import pandas as pd
+import pytest
+import alert_evaluator
+from alert_evaluator import OutboxMailer, apply_hysteresis, evaluate_alerts, in_quiet_hours
+
+LOC = ("Ohio", "Franklin", "Columbus")
+DAY = datetime(2024, 6, 1, 12)
+NIGHT = datetime(2024, 6, 1, 23)
+
+
+def test_hysteresis_holds_category_near_boundary():
+    assert apply_hysteresis(None, 105) == "Unhealthy_Sensitive"
+    assert apply_hysteresis("Moderate", 105, margin=10) == "Moderate"
+    assert apply_hysteresis("Moderate", 111, margin=10) == "Unhealthy_Sensitive"
+    assert apply_hysteresis("Unhealthy_Sensitive", 95, margin=10) == "Unhealthy_Sensitive"
+    assert apply_hysteresis("Unhealthy_Sensitive", 89, margin=10) == "Moderate"
+    assert apply_hysteresis("Good", 160, margin=10) == "Unhealthy"   # a big jump moves straight through
+    assert apply_hysteresis("Moderate", 105, margin=0) == "Unhealthy_Sensitive"
+
+
+def test_quiet_hours_wrap_midnight():
+    hour = lambda h: datetime(2024, 6, 1, h)
+    assert in_quiet_hours(hour(23), (22, 7)) and in_quiet_hours(hour(3), (22, 7))
+    assert not in_quiet_hours(hour(7), (22, 7)) and not in_quiet_hours(hour(12), (22, 7))
+    assert in_quiet_hours(hour(1), (1, 5)) and not in_quiet_hours(hour(5), (1, 5))
+    assert not in_quiet_hours(hour(23), None)
+
+
+@pytest.fixture
+def run(tmp_path, monkeypatch):
+    """evaluate_alerts against a stubbed location list and settable scores; returns (stats, outbox files)."""
+    scores = {}
+    monkeypatch.setattr(alert_evaluator, "load_locations",
+                        lambda start_year: pd.DataFrame([LOC], columns=["State", "County", "City"]))
+    monkeypatch.setattr(alert_evaluator, "score_locations",
+                        lambda locations, date: {loc: scores[loc] for loc in locations})
+    subscribers = tmp_path / "subscribers.csv"
+    outbox = OutboxMailer(str(tmp_path / "outbox"))
+
+    def _run(aqi, now, emails=("a@example.com",)):
+        rows = "".join(f"{email},{','.join(LOC)}\n" for email in emails)
+        if not subscribers.exists() or subscribers.read_text() != "email,state,county,city\n" + rows:
+            subscribers.write_text("email,state,county,city\n" + rows)
+        scores[LOC] = aqi
+        stats = evaluate_alerts(outbox, str(subscribers), str(tmp_path / "state.json"),
+                                hysteresis=10, quiet_hours=(22, 7), now=now)
+        return stats, sorted(os.listdir(outbox.directory))
+
+    return _run
+
+
+def test_first_run_is_a_silent_baseline_then_changes_notify(run):
+    stats, sent = run(40, DAY)
+    assert stats["sent"] == 0 and sent == []
+
+    stats, sent = run(45, DAY)                 # same category
+    assert stats["changed"] == 0 and sent == []
+
+    stats, sent = run(130, DAY)
+    assert (stats["changed"], stats["sent"]) == (1, 1)
+    assert len(sent) == 1 and "a_at_example.com" in sent[0]
+
+
+def test_quiet_hours_hold_and_changed_back_cancels(run):
+    run(40, DAY)
+    stats, sent = run(130, NIGHT)
+    assert (stats["sent"], stats["queued"]) == (0, 1)
+
+    stats, sent = run(40, NIGHT)               # back to what they were told: nothing to send
+    assert (stats["changed"], stats["queued"]) == (1, 0)
+
+    stats, sent = run(40, DAY)
+    assert stats["sent"] == 0 and sent == []
+
+
+def test_pending_is_sent_after_quiet_hours(run):
+    run(40, DAY)
+    run(130, NIGHT)
+    stats, sent = run(130, DAY)
+    assert (stats["changed"], stats["sent"], stats["queued"]) == (0, 1, 0)
+    assert len(sent) == 1
+
+
+def test_new_subscriber_gets_silent_baseline(run):
+    run(40, DAY)
+    run(130, DAY)
+    stats, sent = run(130, DAY, emails=("a@example.com", "b@example.com"))
+    assert stats["sent"] == 0 and len(sent) == 1
+
+    stats, sent = run(40, DAY, emails=("a@example.com", "b@example.com"))
+    assert stats["sent"] == 2
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from climatology import METRICS, PERCENTILES, STATS, Climatology
+
+LOCATION = ("Ohio", "Franklin", "Columbus")
+
+
+def _climatology(bands, metric="Overall_AQI"):
+    """One location with the given p5..p95 bands for metric in January; other months empty."""
+    values = np.full((1, 12, len(METRICS), len(STATS)), np.nan, dtype=np.float32)
+    values[0, 0] = 0.0
+    values[0, 0, METRICS.index(metric)] = [np.mean(bands)] + list(bands)
+    return Climatology(*(np.array([part]) for part in LOCATION), values)
+
+
+@pytest.fixture
+def climatology():
+    # p5, p10 and p25 tied at 10, then 20, 30, 40, 50
+    return _climatology([10, 10, 10, 20, 30, 40, 50])
+
+
+def test_tied_bands_get_the_middle_of_their_ranks(climatology):
+    assert climatology.percentile_rank(*LOCATION, 1, 10) == pytest.approx((5 + 10 + 25) / 3)
+
+
+def test_value_on_a_single_band_gets_its_rank(climatology):
+    assert climatology.percentile_rank(*LOCATION, 1, 30) == 75
+    assert climatology.percentile_rank(*LOCATION, 1, 50) == 95
+
+
+def test_linear_between_adjacent_bands(climatology):
+    assert climatology.percentile_rank(*LOCATION, 1, 15) == pytest.approx(37.5)   # halfway p25 -> p50
+    assert climatology.percentile_rank(*LOCATION, 1, 36) == pytest.approx(84)     # 60% of p75 -> p90
+
+
+def test_clamped_outside_the_outer_bands(climatology):
+    assert climatology.percentile_rank(*LOCATION, 1, 0) == PERCENTILES[0]
+    assert climatology.percentile_rank(*LOCATION, 1, 9.99) == PERCENTILES[0]
+    assert climatology.percentile_rank(*LOCATION, 1, 50.01) == PERCENTILES[-1]
+    assert climatology.percentile_rank(*LOCATION, 1, 500) == PERCENTILES[-1]
+
+
+def test_all_bands_tied():
+    flat = _climatology([0] * len(PERCENTILES), metric="SO2 AQI")
+    assert flat.percentile_rank(*LOCATION, 1, 0, metric="SO2 AQI") == pytest.approx(np.mean(PERCENTILES))
+    assert flat.percentile_rank(*LOCATION, 1, 1, metric="SO2 AQI") == PERCENTILES[-1]
+
+
+def test_unknown_location_or_empty_month(climatology):
+    assert climatology.percentile_rank("Ohio", "Franklin", "Nowhere", 1, 10) is None
+    assert climatology.percentile_rank(*LOCATION, 2, 10) is None
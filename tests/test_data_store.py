@@ -0,0 +1,31 @@
+import os
+import pandas as pd
+import data_store
+from data_store import LOCATION_COLUMNS, POLLUTANT_TARGETS, dataset_version, load_compact_dataset, load_locations
+
+
+def _write_csv(path, cities):
+    rows = [
+        {"Date": f"2021-01-{day:02d}", "State": "Ohio", "County": "Franklin", "City": city,
+         **{target: float(day) for target in POLLUTANT_TARGETS}}
+        for city in cities for day in (1, 2, 3)
+    ]
+    pd.DataFrame(rows, columns=["Date"] + LOCATION_COLUMNS + POLLUTANT_TARGETS).to_csv(path, index=False)
+
+
+def test_replaced_dataset_is_reloaded(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)   # no partitioned store here: reads come from the CSV
+    path = str(tmp_path / "data.csv")
+    _write_csv(path, ["Columbus"])
+    first = dataset_version(path)
+    assert load_locations(filepath=path)["City"].tolist() == ["Columbus"]
+    assert len(load_compact_dataset(path)) == 3
+
+    # What a fresh download does: new file and new checksum sidecar
+    os.remove(path + ".sha256")
+    _write_csv(path, ["Columbus", "Dayton"])
+    assert dataset_version(path) != first
+    assert load_locations(filepath=path)["City"].tolist() == ["Columbus", "Dayton"]
+    assert len(load_compact_dataset(path)) == 6
+    # Entries for the replaced version are dropped, not kept alongside
+    assert all(key[2] != first for key in data_store._cache if key[1] == path)
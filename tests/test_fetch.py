@@ -0,0 +1,193 @@
+import os
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import fetch
+
+PAYLOAD = b"".join(f"2020-01-{i % 28 + 1:02d},Ohio,County,City,{i}\n".encode() for i in range(5000))
+SHA256 = hashlib.sha256(PAYLOAD).hexdigest()
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serves PAYLOAD with HEAD, Range (206) and 416 support, and records what it was asked."""
+
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self.requests.append(("HEAD", None))
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(PAYLOAD)))
+        self.end_headers()
+
+    def do_GET(self):
+        byte_range = self.headers.get("Range")
+        self.requests.append(("GET", byte_range))
+        if byte_range is None:
+            self.send_response(200)
+            body = PAYLOAD
+        else:
+            start = int(byte_range.split("=")[1].rstrip("-"))
+            if start >= len(PAYLOAD):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(PAYLOAD)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(PAYLOAD) - 1}/{len(PAYLOAD)}")
+            body = PAYLOAD[start:]
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    RangeHandler.requests = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/data.csv"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_fresh_download_is_verified_and_recorded(server, tmp_path):
+    dest = str(tmp_path / "data.csv")
+    assert fetch.fetch_file(dest, url=server, sha256=SHA256) == dest
+    assert open(dest, "rb").read() == PAYLOAD
+    assert open(dest + ".sha256").read().strip() == SHA256
+    assert not os.path.exists(dest + ".part")
+
+
+def test_second_call_does_not_download_again(server, tmp_path):
+    dest = str(tmp_path / "data.csv")
+    fetch.fetch_file(dest, url=server, sha256=SHA256)
+    RangeHandler.requests.clear()
+    fetch.fetch_file(dest, url=server, sha256=SHA256)
+    assert RangeHandler.requests == []
+
+
+def test_interrupted_download_resumes_from_part_file(server, tmp_path):
+    dest = str(tmp_path / "data.csv")
+    half = len(PAYLOAD) // 2
+    with open(dest + ".part", "wb") as f:
+        f.write(PAYLOAD[:half])
+
+    fetch.fetch_file(dest, url=server, sha256=SHA256)
+    assert ("GET", f"bytes={half}-") in RangeHandler.requests
+    assert open(dest, "rb").read() == PAYLOAD
+
+
+def test_checksum_mismatch_never_reaches_dest(server, tmp_path):
+    dest = str(tmp_path / "data.csv")
+    with pytest.raises(fetch.ChecksumError):
+        fetch.fetch_file(dest, url=server, sha256="0" * 64)
+    assert not os.path.exists(dest)
+    assert not os.path.exists(dest + ".part")
+
+
+def test_complete_part_file_accepted_on_416(server, tmp_path):
+    dest = str(tmp_path / "data.csv")
+    with open(dest + ".part", "wb") as f:
+        f.write(PAYLOAD)
+
+    fetch.fetch_file(dest, url=server, sha256=SHA256)
+    assert ("GET", f"bytes={len(PAYLOAD)}-") in RangeHandler.requests
+    assert open(dest, "rb").read() == PAYLOAD
+
+
+def test_oversized_part_file_restarts_on_416(server, tmp_path):
+    dest = str(tmp_path / "data.csv")
+    with open(dest + ".part", "wb") as f:
+        f.write(PAYLOAD + b"garbage from another file\n")
+
+    fetch.fetch_file(dest, url=server, sha256=SHA256)
+    assert ("GET", None) in RangeHandler.requests
+    assert open(dest, "rb").read() == PAYLOAD
+
+
+def test_complete_unverified_copy_is_adopted_without_download(server, tmp_path):
+    dest = str(tmp_path / "data.csv")
+    with open(dest, "wb") as f:
+        f.write(PAYLOAD)
+
+    fetch.fetch_file(dest, url=server, sha256=None)
+    assert [method for method, _ in RangeHandler.requests] == ["HEAD"]
+    assert open(dest + ".sha256").read().strip() == SHA256
+
+
+def test_truncated_unverified_copy_is_resumed_not_adopted(server, tmp_path):
+    dest = str(tmp_path / "data.csv")
+    cut = len(PAYLOAD) - 1234
+    with open(dest, "wb") as f:
+        f.write(PAYLOAD[:cut])
+
+    fetch.fetch_file(dest, url=server, sha256=None)
+    assert ("GET", f"bytes={cut}-") in RangeHandler.requests
+    assert open(dest, "rb").read() == PAYLOAD
+    assert open(dest + ".sha256").read().strip() == SHA256
+
+
+DRIVE = "https://drive.google.com/uc?id=test"
+
+
+@pytest.fixture
+def fake_gdown(monkeypatch):
+    """gdown.download stand-in with gdown's file handling: skip an existing output, resume "<output>*.part"."""
+    calls = []
+
+    def download(url, output, quiet=False, resume=False):
+        if resume and os.path.isfile(output):
+            calls.append(("skipped", None))
+            return output
+        folder, prefix = os.path.dirname(output), os.path.basename(output)
+        partials = [f for f in os.listdir(folder) if f.startswith(prefix) and f.endswith(".part")]
+        assert len(partials) <= 1
+        partial = os.path.join(folder, partials[0]) if partials else output + ".tmp123.part"
+        offset = os.path.getsize(partial) if os.path.exists(partial) else 0
+        calls.append(("download", offset))
+        with open(partial, "ab") as f:
+            f.write(PAYLOAD[offset:])
+        os.replace(partial, output)
+        return output
+
+    monkeypatch.setattr(fetch.gdown, "download", download)
+    return calls
+
+
+def test_drive_download_resumes_truncated_copy(fake_gdown, tmp_path):
+    dest = str(tmp_path / "data.csv")
+    cut = len(PAYLOAD) - 1234   # mid-line, like an interrupted download
+    with open(dest, "wb") as f:
+        f.write(PAYLOAD[:cut])
+
+    fetch.fetch_file(dest, url=DRIVE, sha256=None)
+    assert fake_gdown == [("download", cut)]
+    assert open(dest, "rb").read() == PAYLOAD
+    assert open(dest + ".sha256").read().strip() == SHA256
+    assert sorted(os.listdir(tmp_path)) == ["data.csv", "data.csv.lock", "data.csv.sha256"]
+
+
+def test_drive_download_resumes_gdown_partial(fake_gdown, tmp_path):
+    dest = str(tmp_path / "data.csv")
+    with open(dest + ".gdownab12.part", "wb") as f:   # gdown's own temp file from an interrupted run
+        f.write(PAYLOAD[:1000])
+
+    fetch.fetch_file(dest, url=DRIVE, sha256=SHA256)
+    assert fake_gdown == [("download", 1000)]
+    assert open(dest, "rb").read() == PAYLOAD
+
+
+def test_drive_download_never_skips_on_stale_output(fake_gdown, tmp_path):
+    dest = str(tmp_path / "data.csv")
+    with open(dest + ".gdown", "wb") as f:
+        f.write(PAYLOAD[:500])
+
+    fetch.fetch_file(dest, url=DRIVE, sha256=SHA256)
+    assert ("skipped", None) not in fake_gdown
+    assert open(dest, "rb").read() == PAYLOAD
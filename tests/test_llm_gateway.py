@@ -0,0 +1,174 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from llm_gateway import LLMGateway, TokenBucket, prompt_key
+
+
+class RateLimited(Exception):
+    code = 429
+
+
+def _gateway(**kwargs):
+    # Generous limits unless a test is about them
+    params = {"max_concurrency": 8, "rate_per_s": 1000.0, "burst": 1000, "queue_timeout": 5.0, "backoff_s": 0.01}
+    params.update(kwargs)
+    return LLMGateway(**params)
+
+
+def _concurrently(n, fn):
+    start = threading.Barrier(n)
+
+    def run(i):
+        start.wait()
+        return fn(i)
+
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        return list(pool.map(run, range(n)))
+
+
+def test_identical_in_flight_prompts_share_one_upstream_call():
+    gateway = _gateway()
+    release = threading.Event()
+    calls = []
+
+    def call():
+        calls.append(1)
+        release.wait(5)
+        return "stay indoors"
+
+    # Case and whitespace differences still coalesce
+    prompts = ["Is it safe outside?", "  is it SAFE   outside? "]
+    timer = threading.Timer(0.3, release.set)
+    timer.start()
+    results = _concurrently(10, lambda i: gateway.generate(prompts[i % 2], call))
+    timer.cancel()
+
+    assert results == ["stay indoors"] * 10
+    assert len(calls) == 1
+    metrics = gateway.metrics()
+    assert (metrics["requests"], metrics["upstream_calls"], metrics["coalesced"]) == (10, 1, 9)
+
+
+def test_distinct_prompts_are_not_coalesced():
+    gateway = _gateway()
+    results = _concurrently(4, lambda i: gateway.generate(f"question {i}", lambda: time.sleep(0.05) or "ok"))
+    assert results == ["ok"] * 4
+    assert gateway.metrics()["upstream_calls"] == 4
+    assert prompt_key("question 1") != prompt_key("question 2")
+
+
+def test_leader_error_reaches_every_coalesced_caller():
+    gateway = _gateway()
+
+    def call():
+        time.sleep(0.2)
+        raise ValueError("upstream down")
+
+    def ask(i):
+        try:
+            gateway.generate("same question", call)
+        except ValueError as e:
+            return str(e)
+
+    assert _concurrently(5, ask) == ["upstream down"] * 5
+    metrics = gateway.metrics()
+    assert metrics["upstream_calls"] == 1
+    assert metrics["failed"] == 5
+
+
+def test_concurrency_is_capped():
+    gateway = _gateway(max_concurrency=2)
+    lock = threading.Lock()
+    running, peak = [0], [0]
+
+    def call():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return "ok"
+
+    _concurrently(8, lambda i: gateway.generate(f"question {i}", call))
+    assert peak[0] == 2
+
+
+def test_token_bucket_paces_after_the_burst():
+    bucket = TokenBucket(rate=20.0, capacity=2)
+    t0 = time.monotonic()
+    for _ in range(6):
+        bucket.acquire(timeout=5)
+    # Two tokens are saved up; the other four arrive at 20/s
+    assert time.monotonic() - t0 >= 4 / 20 - 0.02
+
+
+def test_token_bucket_times_out():
+    bucket = TokenBucket(rate=0.1, capacity=1)
+    bucket.acquire()
+    with pytest.raises(TimeoutError):
+        bucket.acquire(timeout=0.05)
+
+
+def test_gateway_start_rate_is_limited():
+    gateway = _gateway(rate_per_s=20.0, burst=1)
+    t0 = time.monotonic()
+    _concurrently(5, lambda i: gateway.generate(f"question {i}", lambda: "ok"))
+    assert time.monotonic() - t0 >= 4 / 20 - 0.02
+
+
+def test_rate_limit_errors_are_retried_with_backoff():
+    gateway = _gateway(max_retries=3)
+    attempts = []
+
+    def call():
+        attempts.append(time.monotonic())
+        if len(attempts) < 3:
+            raise RateLimited("429 quota exceeded")
+        return "ok"
+
+    assert gateway.generate("question", call) == "ok"
+    metrics = gateway.metrics()
+    assert (metrics["upstream_calls"], metrics["rate_limited"], metrics["failed"]) == (3, 2, 0)
+    # Backoff doubles: 0.01 s, then 0.02 s
+    assert attempts[1] - attempts[0] >= 0.01
+    assert attempts[2] - attempts[1] >= 0.02
+
+
+def test_rate_limit_retries_are_bounded():
+    gateway = _gateway(max_retries=2)
+
+    def call():
+        raise RateLimited("429 quota exceeded")
+
+    with pytest.raises(RateLimited):
+        gateway.generate("question", call)
+    metrics = gateway.metrics()
+    assert (metrics["upstream_calls"], metrics["rate_limited"], metrics["failed"]) == (3, 2, 1)
+
+
+def test_other_errors_are_not_retried():
+    gateway = _gateway()
+
+    def call():
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        gateway.generate("question", call)
+    assert gateway.metrics()["upstream_calls"] == 1
+
+
+def test_queue_timeout_when_no_slot_frees_up():
+    gateway = _gateway(max_concurrency=1, queue_timeout=0.1)
+    release = threading.Event()
+    holder = threading.Thread(target=gateway.generate, args=("slow question", lambda: release.wait(5)))
+    holder.start()
+    time.sleep(0.05)
+    try:
+        with pytest.raises(TimeoutError):
+            gateway.generate("another question", lambda: "ok")
+    finally:
+        release.set()
+        holder.join()
+    assert gateway.metrics()["failed"] == 1
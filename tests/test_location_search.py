@@ -0,0 +1,39 @@
+import pytest
+from location_search import LocationIndex, location_label
+
+LOCATIONS = [
+    ("Texas", "Harris", "Houston"),
+    ("Texas", "Harris", "Pasadena"),
+    ("California", "Los Angeles", "Pasadena"),
+    ("Ohio", "Franklin", "Columbus"),
+    ("Georgia", "Muscogee", "Columbus"),
+    ("Nevada", "Carson City", "Carson City"),
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return LocationIndex(LOCATIONS)
+
+
+@pytest.mark.parametrize("query", ["Houston", "houston, harr", "Houston, Harris County",
+                                   "Houston, Harris County, Texas", "Houston City", "houston city, harris county"])
+def test_label_shaped_queries_find_the_location(index, query):
+    assert index.search(query)[0] == ("Texas", "Harris", "Houston")
+
+
+def test_every_label_finds_itself_first(index):
+    for loc in LOCATIONS:
+        assert index.search(location_label(*loc))[0] == loc
+
+
+def test_suffix_words_do_not_widen_the_match(index):
+    assert set(index.search("Columbus City")) == {("Ohio", "Franklin", "Columbus"), ("Georgia", "Muscogee", "Columbus")}
+    assert index.search("Pasadena, Harris County") == [("Texas", "Harris", "Pasadena")]
+    assert index.search("Columbus, Harris County") == []
+
+
+def test_suffix_word_alone_still_matches_names(index):
+    assert index.search("city") == [("Nevada", "Carson City", "Carson City")]
+    assert index.search("Carson City") == [("Nevada", "Carson City", "Carson City")]
+    assert index.search("") == [] and index.search("zzz") == []
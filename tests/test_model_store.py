@@ -0,0 +1,110 @@
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from data_store import AQI_COLUMNS
+from model_store import COMPILED_MIN_ROWS, INTERVAL_QUANTILES, OVERALL_AQI, save_model, load_model
+from train_model import FEATURE_COLUMNS, build_pipeline
+
+TARGETS = AQI_COLUMNS
+
+
+def _rows(n, seed):
+    rng = np.random.default_rng(seed)
+    states = rng.choice(["Ohio", "Texas", "New York"], n)
+    counties = np.array([f"C{s}{k}" for s, k in zip(states, rng.integers(0, 3, n))])
+    cities = np.array([f"{c}-city{k}" for c, k in zip(counties, rng.integers(0, 2, n))])
+    dates = pd.to_datetime("2020-01-01") + pd.to_timedelta(rng.integers(0, 4 * 365, n), unit="D")
+    return pd.DataFrame({
+        "Year": dates.year, "Month": dates.month, "Day": dates.day,
+        "State": states, "County": counties, "City": cities,
+    })[FEATURE_COLUMNS]
+
+
+@pytest.fixture(scope="module")
+def fitted(tmp_path_factory):
+    X = _rows(3000, seed=0)
+    rng = np.random.default_rng(1)
+    y = pd.DataFrame({
+        "O3 AQI": 40 + 10 * np.sin(X["Month"] / 2) + rng.normal(0, 5, len(X)),
+        "CO AQI": 20 + (X["State"] == "Texas") * 15 + rng.normal(0, 3, len(X)),
+        "SO2 AQI": rng.gamma(2, 5, len(X)),
+        "NO2 AQI": 30 + 10 * np.cos(X["Day"] / 5) + rng.normal(0, 8, len(X)),
+    })
+    pipeline = build_pipeline(n_estimators=8, n_jobs=1).fit(X, y)
+    model_dir = save_model(pipeline, str(tmp_path_factory.mktemp("store") / "model"), targets=TARGETS)
+    return pipeline, load_model(model_dir)
+
+
+def _cases(X):
+    cases = [
+        (r.State, r.County, r.City, datetime.date(int(r.Year), int(r.Month), int(r.Day)))
+        for r in X.itertuples(index=False)
+    ]
+    state, county, city, date = cases[0]
+    # Unseen city, and an entirely unknown location (handle_unknown="ignore" -> all zeros)
+    return cases + [(state, county, "Nowhere", date), ("Atlantis", "Unknown", "Nowhere", date)]
+
+
+def _frame(state, county, city, date):
+    return pd.DataFrame([{"Year": date.year, "Month": date.month, "Day": date.day,
+                          "State": state, "County": county, "City": city}])[FEATURE_COLUMNS]
+
+
+def test_row_encoder_matches_column_transformer(fitted):
+    pipeline, model = fitted
+    preprocessor = pipeline.named_steps["preprocessor"]
+    for state, county, city, date in _cases(_rows(100, seed=2)):
+        expected = preprocessor.transform(_frame(state, county, city, date))
+        expected = expected.toarray() if hasattr(expected, "toarray") else expected
+        encoded = model.encoder.encode({"Year": date.year, "Month": date.month, "Day": date.day,
+                                        "State": state, "County": county, "City": city})
+        np.testing.assert_array_equal(encoded, expected.astype(np.float32))
+
+
+def test_predict_one_matches_pipeline_exactly(fitted):
+    pipeline, model = fitted
+    for case in _cases(_rows(100, seed=3)):
+        np.testing.assert_array_equal(model.predict_one(*case), pipeline.predict(_frame(*case))[0])
+
+
+def test_batch_predict_matches_pipeline_exactly(fitted):
+    pipeline, model = fitted
+    X = _rows(500, seed=4)
+    np.testing.assert_array_equal(model.predict(X), pipeline.predict(X))
+
+
+def test_compiled_path_matches_walk_and_pipeline(fitted):
+    pipeline, model = fitted
+    X = _rows(COMPILED_MIN_ROWS + 7, seed=6)
+    Xt = model.transform(X)
+    np.testing.assert_array_equal(model.compiled_leaf_nodes(Xt), model.walk_leaf_nodes(Xt))
+    np.testing.assert_array_equal(model.predict(X), pipeline.predict(X))
+
+
+def test_overall_interval_uses_per_tree_max_and_contains_point(fitted):
+    pipeline, model = fitted
+    X = _rows(300, seed=7)
+    point, lower, upper = model.predict_interval(X)
+    assert model.interval_targets == TARGETS + [OVERALL_AQI]
+    assert lower.shape == upper.shape == (len(X), len(TARGETS) + 1)
+
+    Xt = pipeline.named_steps["preprocessor"].transform(X)
+    per_tree = np.stack([tree.predict(Xt) for tree in pipeline.named_steps["regressor"].estimators_], axis=1)
+    tree_low, tree_high = np.quantile(per_tree.max(axis=2), INTERVAL_QUANTILES, axis=1)
+    overall = point.max(axis=1)
+    np.testing.assert_allclose(lower[:, -1], np.minimum(tree_low, overall))
+    np.testing.assert_allclose(upper[:, -1], np.maximum(tree_high, overall))
+
+    centre = np.column_stack([point, overall])
+    assert (lower <= centre).all() and (centre <= upper).all()
+
+
+def test_encoder_fallback_uses_dataframe_path(fitted):
+    pipeline, model = fitted
+    case = _cases(_rows(1, seed=5))[0]
+    encoder, model.encoder = model.encoder, None
+    try:
+        np.testing.assert_array_equal(model.predict_one(*case), pipeline.predict(_frame(*case))[0])
+    finally:
+        model.encoder = encoder
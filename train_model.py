@@ -6,34 +6,30 @@ from sklearn.compose import ColumnTransformer
 from sklearn.preprocessing import OneHotEncoder
 from sklearn.pipeline import Pipeline
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from preprocess import load_and_preprocess_data
+from data_store import load_compact_dataset, POLLUTANT_TARGETS
 
-def train_regression_model():
-    df, le = load_and_preprocess_data(
-        "data/US_air_pollution_dataset_2000_2023.csv",
-        start_year=2020
-    )
+FEATURE_COLUMNS = ["Year", "Month", "Day", "State", "County", "City"]
 
-    
-    df["Year"] = df["Date"].dt.year
-    df["Month"] = df["Date"].dt.month
-    df["Day"] = df["Date"].dt.day
+def load_training_data(start_year=2020, targets=POLLUTANT_TARGETS):
+    """Features and pollutant targets (all 12 by default) from the partitioned store, else the shared compact frame."""
+    from partitions import partitions_current, read_partitions
 
-    
-    X_reg = df[["Year", "Month", "Day", "State", "County", "City"]]
-    y_reg = df[[
-        "O3 Mean", "O3 1st Max Value", "O3 AQI",
-        "CO Mean", "CO 1st Max Value", "CO AQI",
-        "SO2 Mean", "SO2 1st Max Value", "SO2 AQI",
-        "NO2 Mean", "NO2 1st Max Value", "NO2 AQI"
-    ]]
+    if partitions_current():
+        # Only the start_year+ partitions are read
+        df = read_partitions(start_year=start_year)
+        df["Month"] = df["Date"].dt.month.astype("int8")
+        df["Day"] = df["Date"].dt.day.astype("int8")
+    else:
+        # Shared compact frame (already cleaned, with Year/Month/Day columns)
+        df = load_compact_dataset()
+        df = df[df["Year"] >= start_year]
 
-    
-    X_train, X_test, y_train, y_test = train_test_split(
-        X_reg, y_reg, test_size=0.2, random_state=42
-    )
+    X_reg = df[FEATURE_COLUMNS]
+    y_reg = df[targets]
+    return X_reg, y_reg
 
-    
+def build_pipeline(n_estimators=100, max_depth=None, min_samples_leaf=1, n_jobs=-1):
+    """One-hot location encoder + multi-output Random Forest (size limits optional)."""
     categorical_features = ["State", "County", "City"]
     numeric_features = ["Year", "Month", "Day"]
 
@@ -46,35 +42,59 @@ def train_regression_model():
 
     
     regressor = RandomForestRegressor(
-        n_estimators=100,
+        n_estimators=n_estimators,
+        max_depth=max_depth,
+        min_samples_leaf=min_samples_leaf,
         random_state=42,
-        n_jobs=-1
+        n_jobs=n_jobs
     )
 
-    reg_pipeline = Pipeline(steps=[
+    return Pipeline(steps=[
         ("preprocessor", preprocessor),
         ("regressor", regressor)
     ])
 
+def evaluate_model(model, X_test, y_test):
+    """MAE / MSE / RMSE / R² over all targets."""
+    y_pred = model.predict(X_test)
+    mse = mean_squared_error(y_test, y_pred)
+    return {
+        "mae": mean_absolute_error(y_test, y_pred),
+        "mse": mse,
+        "rmse": np.sqrt(mse),
+        "r2": r2_score(y_test, y_pred),
+    }
+
+def train_regression_model(n_estimators=100, max_depth=None, min_samples_leaf=1, full_history=False,
+                           targets=POLLUTANT_TARGETS):
+    if full_history:
+        # Bounded-memory per-location sample of every year (streamed from the raw CSV)
+        from full_history import sample_history
+        X_reg, y_reg = sample_history()
+        y_reg = y_reg[targets]
+    else:
+        X_reg, y_reg = load_training_data(targets=targets)
+
+    
+    X_train, X_test, y_train, y_test = train_test_split(
+        X_reg, y_reg, test_size=0.2, random_state=42
+    )
+
+    reg_pipeline = build_pipeline(n_estimators, max_depth, min_samples_leaf)
+
     
     print("🔄 Training Random Forest Regressor...")
     reg_pipeline.fit(X_train, y_train)
 
    
-    y_pred = reg_pipeline.predict(X_test)
-
-    mae = mean_absolute_error(y_test, y_pred)
-    mse = mean_squared_error(y_test, y_pred)
-    rmse = np.sqrt(mse)
-    r2 = r2_score(y_test, y_pred)
+    metrics = evaluate_model(reg_pipeline, X_test, y_test)
 
     print("\n📊 Model Evaluation Results:")
-    print(f"Mean Absolute Error (MAE): {mae:.3f}")
-    print(f"Mean Squared Error (MSE): {mse:.3f}")
-    print(f"Root Mean Squared Error (RMSE): {rmse:.3f}")
-    print(f"R² Score (Accuracy): {r2:.3f}")
+    print(f"Mean Absolute Error (MAE): {metrics['mae']:.3f}")
+    print(f"Mean Squared Error (MSE): {metrics['mse']:.3f}")
+    print(f"Root Mean Squared Error (RMSE): {metrics['rmse']:.3f}")
+    print(f"R² Score (Accuracy): {metrics['r2']:.3f}")
 
-    print("\n✅ Model trained successfully (no external file saved).")
-    print("💾 Model will be re-trained each time the app starts.")
+    print("\n✅ Model trained successfully.")
 
     return reg_pipeline